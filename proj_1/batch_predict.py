@@ -0,0 +1,179 @@
+#scoring feature files that are too big to load, one chunk at a time
+# predict() needs the whole X in memory and returns one big array
+# here the features are read a chunk at a time, each chunk is scored, and its predictions are written out
+# (or handed back) before the next chunk is read, so memory use depends on the chunk size, not the file size
+
+# sources:
+    # a .npy file: memory-mapped, each chunk is a slice of rows (the OS reads just those pages)
+    # a .csv (or any other text) file with a header row: split into byte ranges that end on line breaks,
+        # parsed by a pool of worker processes (text parsing is the slow part, so it uses every core)
+    # an array already in memory, or chunks like streaming.array_chunks / npy_chunks give (only X is used)
+# outputs: a .npy file (written row block by row block, the header gets the final row count at the end)
+# or a .csv file with a "prediction" header, the same format as `python main.py predict --output`
+
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model_io import LinearScorer
+from streaming import iter_chunks
+
+DEFAULT_CHUNK_ROWS = 65536
+# CSV chunks are measured in bytes of text, ~8 MB is roughly 100k housing rows
+DEFAULT_CSV_CHUNK_BYTES = 8 * 2**20
+
+
+def npy_feature_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    X = np.load(path, mmap_mode='r')
+    for start in range(0, X.shape[0], chunk_rows):
+        yield X[start:start + chunk_rows]
+
+
+# (start, stop) byte offsets covering the rows after the header
+# each range is about chunk_bytes long and always ends right after a line break, so no row is split in two
+def _csv_ranges(path, chunk_bytes):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            # finish the line the jump landed in
+            f.readline()
+            stop = f.tell()
+            yield start, stop
+            start = stop
+
+
+def _parse_csv_range(path, start, stop, dtype):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    return np.loadtxt(io.BytesIO(data), delimiter=",", ndmin=2, dtype=dtype)
+
+
+# n_jobs = number of parsing processes (None = one per CPU core, 1 = parse in this process)
+# chunks come back in file order, and at most 2 per worker are parsed ahead,
+# which keeps every worker busy while bounding how much parsed data waits in memory
+def csv_feature_chunks(path, chunk_bytes=DEFAULT_CSV_CHUNK_BYTES, n_jobs=None, dtype=np.float64):
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        for start, stop in _csv_ranges(path, chunk_bytes):
+            X = _parse_csv_range(path, start, stop, dtype)
+            if len(X):
+                yield X
+        return
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        pending = deque()
+        for start, stop in _csv_ranges(path, chunk_bytes):
+            pending.append(pool.submit(_parse_csv_range, path, start, stop, dtype))
+            if len(pending) >= 2 * n_jobs:
+                X = pending.popleft().result()
+                if len(X):
+                    yield X
+        while pending:
+            X = pending.popleft().result()
+            if len(X):
+                yield X
+
+
+# any supported source as an iterator of feature blocks
+def feature_chunks(source, chunk_rows=DEFAULT_CHUNK_ROWS, csv_chunk_bytes=DEFAULT_CSV_CHUNK_BYTES, n_jobs=None):
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(".npy"):
+            return npy_feature_chunks(path, chunk_rows)
+        # anything else is read as CSV text
+        return csv_feature_chunks(path, csv_chunk_bytes, n_jobs)
+    if isinstance(source, np.ndarray):
+        return (source[start:start + chunk_rows] for start in range(0, len(source), chunk_rows))
+    # chunks of (X_chunk, y_chunk) from streaming.py, or plain X chunks
+    return (chunk[0] if isinstance(chunk, tuple) else chunk for chunk in iter_chunks(source))
+
+
+# the trained models normalize every chunk before the dot product
+# folding that into the weights (model_io.LinearScorer) makes each chunk a single X @ w + b
+def _fast_scorer(model):
+    if hasattr(model, 'scaler') or hasattr(model, '_mean'):
+        return LinearScorer.from_model(model)
+    return model
+
+
+# predictions for source, one array per chunk
+# model: LinearRegressionScratch, LinearRegressionSklearn, LinearScorer or anything with predict()
+def predict_iter(model, source, chunk_rows=DEFAULT_CHUNK_ROWS, csv_chunk_bytes=DEFAULT_CSV_CHUNK_BYTES,
+                 n_jobs=None):
+    scorer = _fast_scorer(model)
+    for X in feature_chunks(source, chunk_rows, csv_chunk_bytes, n_jobs):
+        yield scorer.predict(X)
+
+
+# a .npy file written block by block
+# the header has to state the number of rows, which isn't known until the end,
+# so it gets a fixed size up front (padded with spaces, as the format allows) and is rewritten at close
+class _NpyWriter:
+    HEADER_SIZE = 128
+
+    def __init__(self, f):
+        self.f = f
+        self.dtype = None
+        self.n_rows = 0
+
+    def _header(self):
+        text = f"{{'descr': '{self.dtype.str}', 'fortran_order': False, 'shape': ({self.n_rows},), }}"
+        prefix = np.lib.format.magic(1, 0)
+        body_size = self.HEADER_SIZE - len(prefix) - 2
+        return prefix + body_size.to_bytes(2, "little") + text.ljust(body_size - 1).encode("latin-1") + b"\n"
+
+    def write(self, predictions):
+        if self.dtype is None:
+            self.dtype = predictions.dtype.newbyteorder('<')
+            self.f.write(self._header())
+        self.f.write(predictions.astype(self.dtype, copy=False).tobytes())
+        self.n_rows += len(predictions)
+
+    def close(self):
+        if self.dtype is None:
+            self.dtype = np.dtype('<f8')
+        self.f.seek(0)
+        self.f.write(self._header())
+
+
+class _CsvWriter:
+
+    def __init__(self, f):
+        self.f = f
+        self.f.write(b"prediction\n")
+
+    def write(self, predictions):
+        np.savetxt(self.f, predictions, fmt="%.6f")
+
+    def close(self):
+        pass
+
+
+# score source and write every prediction to output (.npy, anything else gets CSV text), returns the row count
+# writes into output + ".tmp" and renames at the end, so a crash never leaves half a file under the real name
+def batch_predict(model, source, output, chunk_rows=DEFAULT_CHUNK_ROWS,
+                  csv_chunk_bytes=DEFAULT_CSV_CHUNK_BYTES, n_jobs=None):
+    writer_class = _NpyWriter if output.endswith(".npy") else _CsvWriter
+
+    tmp = output + ".tmp"
+    n_rows = 0
+    try:
+        with open(tmp, "wb") as f:
+            writer = writer_class(f)
+            for predictions in predict_iter(model, source, chunk_rows, csv_chunk_bytes, n_jobs):
+                writer.write(predictions)
+                n_rows += len(predictions)
+            writer.close()
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return n_rows
@@ -0,0 +1,329 @@
+#timing LinearRegressionScratch against LinearRegressionSklearn on synthetic data of many sizes
+# main.py runs one California housing split and reports R^2, this measures how the models scale:
+    # fit time and predict time (best of a few repeats)
+    # peak memory of fit and of predict (tracemalloc, measured in a separate run so tracing doesn't slow the timing)
+    # iterations to tolerance for the gradient based models (a direct solve counts as 1)
+# over a grid of n (rows) x d (features), results go to a JSON file
+# compare mode checks a new results file against a stored baseline and flags anything that got slower / bigger
+
+# python benchmark.py run --n 1000 100000 --d 2 100 --output results.json
+# python benchmark.py run --baseline baseline.json --output results.json   (run, then compare)
+# python benchmark.py compare baseline.json results.json                   (exit code 1 on a regression)
+# python benchmark.py scaling --n 2000000 --d 50 --jobs 1 2 4 8           (gradient_mode="parallel" per-step time)
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from callbacks import Telemetry
+from linear_regression_scratch import LinearRegressionScratch
+
+N_GRID = (10**3, 10**4, 10**5, 10**6, 10**7)
+D_GRID = (2, 10, 100, 1000)
+# cells bigger than this many numbers (n * d) are skipped: 10^7 x 1000 would be 80 GB of float64
+DEFAULT_MAX_ELEMENTS = 2 * 10**7
+DEFAULT_REPEATS = 3
+# the gradient based models stop once the gradient is shorter than this (stop_on="gradient")
+DEFAULT_TOL = 1e-6
+DEFAULT_MAX_ITER = 5000
+
+# how much worse a number may get before compare() calls it a regression
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.10
+# timings under this are mostly noise, so they are never flagged
+MIN_SECONDS = 0.005
+
+
+# the models being compared, name -> function making a fresh unfitted model
+def _model_factories(tol=DEFAULT_TOL, max_iter=DEFAULT_MAX_ITER):
+    factories = {
+        'scratch_gd': lambda: LinearRegressionScratch(learning_rate="auto", n_iterations=max_iter,
+                                                      tol=tol, stop_on="gradient"),
+        'scratch_lbfgs': lambda: LinearRegressionScratch(optimizer="lbfgs", n_iterations=max_iter,
+                                                         tol=tol, stop_on="gradient"),
+        'scratch_cholesky': lambda: LinearRegressionScratch(solver="cholesky"),
+    }
+    # scikit-learn is optional here, the scratch models can be benchmarked without it
+    try:
+        from linear_regression_sklearn import LinearRegressionSklearn
+    except ImportError:
+        pass
+    else:
+        factories['sklearn'] = LinearRegressionSklearn
+    return factories
+
+
+MODELS = tuple(_model_factories())
+
+
+# n x d features with uneven scales and some correlation (a shared factor), like real data
+# plus y = X.w + b + noise, generated block by block so the only big arrays are X and y themselves
+def make_dataset(n, d, seed=0, block_rows=65536):
+    rng = np.random.default_rng([seed, n, d])
+    scales = 10 ** rng.uniform(-1, 1, size=d)
+    true_weights = rng.normal(size=d) / scales
+    X = np.empty((n, d))
+    y = np.empty(n)
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block = X[start:stop]
+        rng.standard_normal(out=block)
+        block += 0.5 * rng.standard_normal((stop - start, 1))
+        block *= scales
+        np.dot(block, true_weights, out=y[start:stop])
+        y[start:stop] += 3.0 + 0.1 * rng.standard_normal(stop - start)
+    return X, y
+
+
+# wall time of the fastest of `repeats` calls (the minimum is the run least disturbed by everything else)
+def _best_time(function, repeats):
+    best = np.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+# largest amount of memory (MB) Python and numpy had allocated at once during function()
+def _peak_mb(function):
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+# every number for one model on one dataset
+def benchmark_case(name, factory, X, y, repeats=DEFAULT_REPEATS, memory=True):
+    fit_s = np.inf
+    for _ in range(max(repeats, 1)):
+        model = factory()
+        started = time.perf_counter()
+        model.fit(X, y)
+        fit_s = min(fit_s, time.perf_counter() - started)
+    predict_s = _best_time(lambda: model.predict(X), max(repeats, 1))
+
+    # sklearn and the direct solvers get there in one solve
+    iterative = getattr(model, 'solver_', None) == "gd"
+    result = {
+        'model': name,
+        'n': len(y),
+        'd': X.shape[1],
+        'fit_s': fit_s,
+        'predict_s': predict_s,
+        'fit_peak_mb': None,
+        'predict_peak_mb': None,
+        'n_iter': int(model.n_iter_) if iterative else 1,
+        'converged': bool(model.converged_) if iterative else True,
+        'r2': float(model.score(X, y)),
+    }
+    if memory:
+        result['fit_peak_mb'] = _peak_mb(lambda: factory().fit(X, y))
+        result['predict_peak_mb'] = _peak_mb(lambda: model.predict(X))
+    return result
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+# the whole grid, returns {'environment': ..., 'settings': ..., 'results': [...], 'skipped': [...]}
+# cells with n * d above max_elements are listed under 'skipped' instead of being run
+def run_benchmarks(n_values=N_GRID, d_values=D_GRID, models=None, repeats=DEFAULT_REPEATS,
+                   max_elements=DEFAULT_MAX_ELEMENTS, tol=DEFAULT_TOL, max_iter=DEFAULT_MAX_ITER,
+                   memory=True, seed=0, verbose=True):
+    factories = _model_factories(tol, max_iter)
+    models = list(models or factories)
+    unknown = [name for name in models if name not in factories]
+    if unknown:
+        raise ValueError(f"unknown models {unknown}, choose from {sorted(factories)}")
+
+    report = {
+        'environment': _environment(),
+        'settings': {'repeats': repeats, 'tol': tol, 'max_iter': max_iter, 'seed': seed, 'max_elements': max_elements},
+        'results': [],
+        'skipped': [],
+    }
+    for n in n_values:
+        for d in d_values:
+            if n * d > max_elements:
+                report['skipped'].append({'n': n, 'd': d, 'reason': f"n * d > max_elements ({max_elements})"})
+                continue
+            X, y = make_dataset(n, d, seed)
+            for name in models:
+                result = benchmark_case(name, factories[name], X, y, repeats, memory)
+                report['results'].append(result)
+                if verbose:
+                    _print_result(result)
+            del X, y
+    return report
+
+
+# per-iteration time of gradient_mode="parallel" for each worker count, on one tall dataset
+# the iteration times come from a Telemetry callback (the median, so worker startup and stragglers don't count)
+# blas_threads=1 keeps each worker on one core, so the worker count is the number of cores used
+def scaling_benchmark(n=2 * 10**6, d=50, jobs=(1, 2, 4), n_iterations=30, blas_threads=1, seed=0, verbose=True):
+    X, y = make_dataset(n, d, seed)
+    report = {'environment': _environment(), 'n': n, 'd': d, 'blas_threads': blas_threads, 'results': []}
+    for n_jobs in jobs:
+        telemetry = Telemetry()
+        started = time.perf_counter()
+        LinearRegressionScratch(learning_rate=0.1, n_iterations=n_iterations, gradient_mode="parallel",
+                                n_jobs=n_jobs, blas_threads=blas_threads).fit(X, y, callbacks=[telemetry])
+        summary = telemetry.summary()
+        result = {
+            'n_jobs': n_jobs,
+            'iteration_ms': summary['iteration_ms_median'],
+            'fit_s': time.perf_counter() - started,
+            'rows_per_s': summary['samples_per_s_median'],
+        }
+        result['speedup'] = report['results'][0]['iteration_ms'] / result['iteration_ms'] if report['results'] else 1.0
+        report['results'].append(result)
+        if verbose:
+            print(f"n_jobs={n_jobs:<3} {result['iteration_ms']:9.2f} ms / iteration   "
+                  f"{result['rows_per_s'] / 1e6:8.1f} M rows/s   speedup {result['speedup']:.2f}x   "
+                  f"(fit incl. startup {result['fit_s']:.2f} s)")
+    return report
+
+
+def _print_result(result):
+    memory = (f"   fit peak {result['fit_peak_mb']:8.1f} MB" if result['fit_peak_mb'] is not None else "")
+    print(f"{result['model']:>16}  n={result['n']:<9} d={result['d']:<5} "
+          f"fit {result['fit_s'] * 1000:10.2f} ms   predict {result['predict_s'] * 1000:9.2f} ms"
+          f"{memory}   iters {result['n_iter']:5d}{'' if result['converged'] else '*'}   R^2 {result['r2']:.4f}")
+
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# what got worse between two reports, as a list of dicts (an empty list = no regressions)
+# times may grow by time_tolerance (0.25 = 25%) and peak memory by memory_tolerance before being flagged
+# iterations to tolerance are deterministic, so any increase is flagged, and so is a model that stopped converging
+def compare_reports(baseline, current, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE,
+                    min_seconds=MIN_SECONDS):
+    baseline_results = {(r['model'], r['n'], r['d']): r for r in baseline['results']}
+    regressions = []
+
+    def flag(result, metric, before, after):
+        regressions.append({'model': result['model'], 'n': result['n'], 'd': result['d'], 'metric': metric,
+                            'baseline': before, 'current': after,
+                            'change': (after / before - 1) if isinstance(before, (int, float)) and before else None})
+
+    for result in current['results']:
+        before = baseline_results.get((result['model'], result['n'], result['d']))
+        if before is None:
+            continue
+        for metric in ('fit_s', 'predict_s'):
+            if result[metric] > max(before[metric], min_seconds) * (1 + time_tolerance):
+                flag(result, metric, before[metric], result[metric])
+        for metric in ('fit_peak_mb', 'predict_peak_mb'):
+            if before.get(metric) is not None and result.get(metric) is not None:
+                if result[metric] > before[metric] * (1 + memory_tolerance):
+                    flag(result, metric, before[metric], result[metric])
+        if result['n_iter'] > before['n_iter']:
+            flag(result, 'n_iter', before['n_iter'], result['n_iter'])
+        if before['converged'] and not result['converged']:
+            flag(result, 'converged', True, False)
+    return regressions
+
+
+def print_comparison(baseline, current, regressions):
+    if baseline.get('environment', {}).get('platform') != current.get('environment', {}).get('platform') \
+            or baseline.get('environment', {}).get('numpy') != current.get('environment', {}).get('numpy'):
+        print("note: the baseline was recorded on a different platform / numpy version, timings may not compare")
+    if not regressions:
+        print(f"no regressions ({len(current['results'])} results checked)")
+        return
+    print(f"{len(regressions)} regression(s):")
+    for r in regressions:
+        change = f"{r['change']:+.0%}" if r['change'] is not None else ""
+        print(f"  {r['model']:>16}  n={r['n']:<9} d={r['d']:<5} {r['metric']:>15}: "
+              f"{r['baseline']} -> {r['current']} {change}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scratch vs scikit-learn linear regression benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark grid and write JSON results")
+    run_parser.add_argument("--n", type=int, nargs="+", default=list(N_GRID), help="row counts to try")
+    run_parser.add_argument("--d", type=int, nargs="+", default=list(D_GRID), help="feature counts to try")
+    run_parser.add_argument("--models", nargs="+", choices=MODELS, default=None, help="default: all of them")
+    run_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                            help=f"timed runs per measurement, the fastest counts (default: {DEFAULT_REPEATS})")
+    run_parser.add_argument("--max-elements", type=float, default=DEFAULT_MAX_ELEMENTS,
+                            help=f"skip datasets with more than this many numbers (default: {DEFAULT_MAX_ELEMENTS:.0e})")
+    run_parser.add_argument("--tol", type=float, default=DEFAULT_TOL, help="gradient norm tolerance")
+    run_parser.add_argument("--max-iter", type=int, default=DEFAULT_MAX_ITER)
+    run_parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+    run_parser.add_argument("--baseline", help="compare against this results file after running")
+
+    scaling_parser = subparsers.add_parser("scaling", help="per-iteration time of the parallel mode vs worker count")
+    scaling_parser.add_argument("--n", type=int, default=2 * 10**6)
+    scaling_parser.add_argument("--d", type=int, default=50)
+    scaling_parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4], help="worker counts to try")
+    scaling_parser.add_argument("--iterations", type=int, default=30)
+    scaling_parser.add_argument("--blas-threads", type=int, default=1, help="BLAS threads per worker (default: 1)")
+    scaling_parser.add_argument("--output", help="also write the results to this JSON file")
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions between two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE,
+                         help=f"allowed slowdown before flagging (default: {TIME_TOLERANCE})")
+        sub.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                         help=f"allowed peak memory growth before flagging (default: {MEMORY_TOLERANCE})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "scaling":
+        report = scaling_benchmark(args.n, args.d, args.jobs, args.iterations, args.blas_threads)
+        if args.output:
+            save_report(report, args.output)
+        return 0
+    if args.command == "run":
+        current = run_benchmarks(args.n, args.d, args.models, args.repeats, int(args.max_elements),
+                                 args.tol, args.max_iter, memory=not args.no_memory)
+        for skipped in current['skipped']:
+            print(f"skipped n={skipped['n']} d={skipped['d']}: {skipped['reason']}")
+        save_report(current, args.output)
+        print(f"results written to {args.output}")
+        if not args.baseline:
+            return 0
+        baseline = load_report(args.baseline)
+    else:
+        baseline, current = load_report(args.baseline), load_report(args.current)
+
+    regressions = compare_reports(baseline, current, args.time_tolerance, args.memory_tolerance)
+    print_comparison(baseline, current, regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#bootstrap confidence intervals for the weights, the bias and the predictions
+# the bootstrap: draw n rows with replacement, refit, repeat B times, and see how much the answers move
+# the middle 95% of the B answers is a 95% confidence interval
+# refitting in a Python loop B times is slow, so all B fits are done together:
+    # a resample only says how many times each row was drawn, so resample b is a count vector c_b (length n)
+    # and its least squares fit solves (A^T diag(c_b) A) theta = A^T diag(c_b) y, A = normalized X plus a column of 1s
+    # stacking the B count vectors into a B x n matrix C turns all B Gram matrices into one matrix product:
+        # C @ (every row's outer product a a^T, flattened) -> B x (d+1)^2, and C @ (a * y) -> B x (d+1)
+    # then np.linalg.solve solves the whole stack of B small systems in one call
+# C is B x n numbers, so for big data the resamples go in batches (and the rows in chunks) under max_elements
+
+import numpy as np
+
+from model_io import _model_parameters
+
+DEFAULT_RESAMPLES = 1000
+DEFAULT_CONFIDENCE = 0.95
+# biggest temporary (count matrix block or outer-product block) in numbers, 2^24 float64 = 128 MB
+DEFAULT_MAX_ELEMENTS = 2**24
+
+
+# the mean / std the intervals are expressed in
+# with a fitted model, its own, so the intervals line up with model.weights / get_coefficients()
+def _normalization(model, X):
+    if model is not None:
+        _, mean, std, _, _ = _model_parameters(model)
+        return np.asarray(mean, dtype=np.float64), np.asarray(std, dtype=np.float64)
+    mean = np.mean(X, axis=0)
+    std = np.std(X, axis=0)
+    std[std == 0] = 1
+    return mean, std
+
+
+# normalized X with a column of 1s on the end for the bias
+def _design_matrix(X, mean, std):
+    A = np.empty((X.shape[0], X.shape[1] + 1))
+    np.subtract(X, mean, out=A[:, :-1])
+    A[:, :-1] /= std
+    A[:, -1] = 1.0
+    return A
+
+
+# solve (A^T diag(c) A) theta = A^T diag(c) y for every row c of counts at once, returns a (k, d + 1) array
+# the rows of A go in chunks, so the n x (d+1)^2 outer products are never all in memory
+# ridge adds ridge * I to every system (0 = plain least squares, a tiny value rescues a resample
+# that happened to miss every row with some feature value, which makes its system singular)
+def weighted_least_squares(A, y, counts, ridge=0.0, max_elements=DEFAULT_MAX_ELEMENTS):
+    n, p = A.shape
+    k = counts.shape[0]
+    gram = np.zeros((k, p * p))
+    rhs = np.zeros((k, p))
+    chunk_rows = max(1, min(n, max_elements // (p * p)))
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        A_chunk = A[start:stop]
+        outer = (A_chunk[:, :, None] * A_chunk[:, None, :]).reshape(stop - start, p * p)
+        C = counts[:, start:stop]
+        gram += np.dot(C, outer)
+        rhs += np.dot(C, A_chunk * y[start:stop, None])
+    gram = gram.reshape(k, p, p)
+    if ridge:
+        gram[:, np.arange(p), np.arange(p)] += ridge
+    # a stack of k (p x p) systems, one LAPACK call for all of them
+    return np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+
+# B bootstrap fits of the least squares line, plus percentile intervals
+# model: a fitted LinearRegressionScratch / LinearRegressionSklearn whose normalization to use (None = from X)
+# X_predict: rows to get prediction intervals for (None = skip predictions)
+# returns a dict:
+    # weights, bias: the fit on all the rows (no resampling), in the normalized units the models use
+    # weights_interval: (2, d) array, low row and high row; bias_interval: (low, high)
+    # samples: (B, d + 1) array of every resample's [weights, bias]
+    # predictions, prediction_interval: the full-data predictions for X_predict and their (2, m) interval
+def bootstrap(X, y, n_resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE, model=None, X_predict=None,
+              random_state=None, ridge=0.0, max_elements=DEFAULT_MAX_ELEMENTS):
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    mean, std = _normalization(model, X)
+    A = _design_matrix(X, mean, std)
+    rng = np.random.default_rng(random_state)
+
+    # every resample is n rows drawn with replacement = one multinomial draw of n over n equally likely rows
+    batch = max(1, min(n_resamples, max_elements // n))
+    uniform = np.full(n, 1.0 / n)
+    samples = np.empty((n_resamples, A.shape[1]))
+    for start in range(0, n_resamples, batch):
+        stop = min(start + batch, n_resamples)
+        counts = rng.multinomial(n, uniform, size=stop - start).astype(np.float64)
+        samples[start:stop] = weighted_least_squares(A, y, counts, ridge, max_elements)
+
+    full_fit = weighted_least_squares(A, y, np.ones((1, n)), ridge, max_elements)[0]
+    tails = [50 * (1 - confidence), 50 * (1 + confidence)]
+    interval = np.percentile(samples, tails, axis=0)
+    result = {
+        'weights': full_fit[:-1],
+        'bias': full_fit[-1],
+        'weights_interval': interval[:, :-1],
+        'bias_interval': (interval[0, -1], interval[1, -1]),
+        'samples': samples,
+        'confidence': confidence,
+    }
+
+    if X_predict is not None:
+        X_predict = np.asarray(X_predict, dtype=np.float64)
+        m = len(X_predict)
+        result['predictions'] = np.empty(m)
+        result['prediction_interval'] = np.empty((2, m))
+        # each block of rows is predicted by all B fits at once (rows x B), then cut down to two percentiles
+        block_rows = max(1, min(m, max_elements // max(n_resamples, 1)))
+        for start in range(0, m, block_rows):
+            stop = min(start + block_rows, m)
+            A_block = _design_matrix(X_predict[start:stop], mean, std)
+            result['predictions'][start:stop] = np.dot(A_block, full_fit)
+            result['prediction_interval'][:, start:stop] = np.percentile(np.dot(A_block, samples.T), tails, axis=1)
+    return result
@@ -0,0 +1,154 @@
+#hooks for watching a model train without changing its code
+# fit(X, y, callbacks=[...]) calls every callback at three points:
+    # on_fit_begin(model, info)      info: n_samples, n_features, n_iterations, solver
+    # on_iteration_end(model, info)  info: iteration (counting from 1), n_iterations, unit ("iteration" / "epoch"),
+                                     #      cost (None when it wasn't measured), grad_norm (None when there isn't one),
+                                     #      seconds (this iteration's wall time), samples_per_s
+    # on_fit_end(model, info)        info: n_iterations_run, converged, seconds (whole fit)
+# direct solvers (and LinearRegressionSklearn) report their one solve as a single iteration
+# a Callback subclass only overrides the events it cares about
+
+import time
+
+import numpy as np
+
+
+class Callback:
+
+    def on_fit_begin(self, model, info):
+        pass
+
+    def on_iteration_end(self, model, info):
+        pass
+
+    def on_fit_end(self, model, info):
+        pass
+
+
+# the progress printout fit used to do on its own (verbose=True adds one of these)
+# every: print every this many iterations, whenever that iteration's cost was measured
+class ProgressPrinter(Callback):
+
+    def __init__(self, every=100):
+        self.every = every
+
+    # learning_rate="auto" has just been measured when a gd fit begins, say what it picked
+    def on_fit_begin(self, model, info):
+        if info['solver'] == "gd" and getattr(model, 'learning_rate', None) == "auto":
+            print(f"Auto learning rate: {model.learning_rate_:.6f} (condition number {model.condition_number_:.1f})")
+
+    def on_iteration_end(self, model, info):
+        if info['iteration'] % self.every == 0 and info['cost'] is not None:
+            print(f"{info['unit'].capitalize()} {info['iteration']}/{info['n_iterations']}, Cost: {info['cost']:.6f}")
+
+    def on_fit_end(self, model, info):
+        if info['converged']:
+            print(f"Converged after {info['n_iterations_run']} iterations")
+
+
+# per-iteration numbers in preallocated numpy arrays (sized from the iteration budget when fit starts)
+# so recording them costs a few array writes per iteration and no list growth
+# cost_stride: keep the cost of every cost_stride-th iteration (iterations cost_stride, 2*cost_stride, ...)
+    # the model only measures the cost every cost_every iterations, so pick a multiple of that
+class Telemetry(Callback):
+
+    def __init__(self, cost_stride=1):
+        if cost_stride < 1:
+            raise ValueError(f"cost_stride must be at least 1, got {cost_stride}")
+        self.cost_stride = cost_stride
+        self.seconds = None
+        self.samples_per_s = None
+        self.grad_norms = None
+        self.costs = None
+        self.n_iterations = 0
+        self.fit_seconds = None
+
+    def on_fit_begin(self, model, info):
+        budget = max(info['n_iterations'], 1)
+        self.seconds = np.zeros(budget)
+        self.samples_per_s = np.zeros(budget)
+        self.grad_norms = np.full(budget, np.nan)
+        self.costs = np.full(max(budget // self.cost_stride, 1), np.nan)
+        self.n_iterations = 0
+        self.fit_seconds = None
+
+    def on_iteration_end(self, model, info):
+        i = self.n_iterations
+        if i >= len(self.seconds):
+            return
+        self.seconds[i] = info['seconds']
+        self.samples_per_s[i] = info['samples_per_s']
+        if info['grad_norm'] is not None:
+            self.grad_norms[i] = info['grad_norm']
+        iteration = info['iteration']
+        if info['cost'] is not None and iteration % self.cost_stride == 0:
+            slot = iteration // self.cost_stride - 1
+            if slot < len(self.costs):
+                self.costs[slot] = info['cost']
+        self.n_iterations = i + 1
+
+    def on_fit_end(self, model, info):
+        self.fit_seconds = info['seconds']
+
+    # the recorded part of the arrays as a dict of summary numbers
+    def summary(self):
+        n = self.n_iterations
+        seconds = self.seconds[:n]
+        grad_norms = self.grad_norms[:n]
+        costs = self.costs[~np.isnan(self.costs)]
+        return {
+            'iterations': n,
+            'fit_seconds': self.fit_seconds,
+            'iteration_ms_mean': float(seconds.mean() * 1000) if n else 0.0,
+            'iteration_ms_median': float(np.median(seconds) * 1000) if n else 0.0,
+            'samples_per_s_median': float(np.median(self.samples_per_s[:n])) if n else 0.0,
+            'final_grad_norm': float(grad_norms[-1]) if n and not np.isnan(grad_norms[-1]) else None,
+            'final_cost': float(costs[-1]) if len(costs) else None,
+        }
+
+
+# what the models use internally: times the iterations and sends the events to every callback
+# with no callbacks every call returns right away, so an uninstrumented fit pays (almost) nothing
+class CallbackList:
+
+    def __init__(self, callbacks=None):
+        self.callbacks = list(callbacks or [])
+        self._fit_started = None
+        self._last = None
+        self._n_iterations = 0
+
+    def fit_begin(self, model, n_samples, n_features, n_iterations, solver):
+        self._fit_started = self._last = time.perf_counter()
+        self._n_samples = n_samples
+        self._n_iterations = n_iterations
+        if not self.callbacks:
+            return
+        info = {'n_samples': n_samples, 'n_features': n_features, 'n_iterations': n_iterations, 'solver': solver}
+        for callback in self.callbacks:
+            callback.on_fit_begin(model, info)
+
+    def iteration_end(self, model, iteration, cost=None, grad_norm=None, unit="iteration"):
+        if not self.callbacks:
+            return
+        now = time.perf_counter()
+        seconds = now - self._last
+        self._last = now
+        info = {
+            'iteration': iteration,
+            'n_iterations': self._n_iterations,
+            'unit': unit,
+            'cost': None if cost is None else float(cost),
+            'grad_norm': None if grad_norm is None else float(grad_norm),
+            'seconds': seconds,
+            'samples_per_s': self._n_samples / seconds if seconds > 0 else float('inf'),
+        }
+        for callback in self.callbacks:
+            callback.on_iteration_end(model, info)
+
+    def fit_end(self, model, n_iterations_run, converged):
+        if not self.callbacks:
+            return
+        info = {'n_iterations_run': n_iterations_run, 'converged': converged,
+                'seconds': time.perf_counter() - self._fit_started}
+        for callback in self.callbacks:
+            callback.on_fit_end(model, info)
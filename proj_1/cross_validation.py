@@ -0,0 +1,96 @@
+#K-fold cross validation
+# one train/test split gives one number that depends on which rows happened to land in the test set
+# K-fold splits the rows into K groups ("folds"), then trains K times: each fold takes one turn as the test set
+# averaging the K scores gives a steadier estimate, repeating with different shuffles steadies it more
+
+# the folds run in parallel in separate processes
+# X and y are copied once into shared memory and every worker reads that same copy,
+# instead of pickling the whole dataset to each worker for each fold
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from linear_regression_sklearn import evaluate_model
+from parallel import attach_array, share_array
+
+
+# the row numbers of one (repeat, fold) pair
+# each repeat shuffles with its own seed, so any process can rebuild the same split from just a few numbers
+# (this is why only the seed gets sent to the workers, never the index arrays)
+def fold_indices(n_samples, n_splits, repeat, fold, seed):
+    order = np.random.default_rng([seed, repeat]).permutation(n_samples)
+    # np.array_split spreads the leftover rows over the first folds when n_samples doesn't divide evenly
+    test_idx = np.array_split(order, n_splits)[fold]
+    train_mask = np.ones(n_samples, dtype=bool)
+    train_mask[test_idx] = False
+    return np.flatnonzero(train_mask), np.sort(test_idx)
+
+
+# worker side: each worker process attaches to the shared blocks once, when it starts
+_worker_blocks = []
+_worker_X = None
+_worker_y = None
+
+
+def _init_worker(X_spec, y_spec):
+    global _worker_X, _worker_y
+    _worker_X = attach_array(X_spec, _worker_blocks)
+    _worker_y = attach_array(y_spec, _worker_blocks)
+
+
+def _evaluate_fold(X, y, model_class, model_params, n_splits, repeat, fold, seed):
+    train_idx, test_idx = fold_indices(len(y), n_splits, repeat, fold, seed)
+    model = model_class(**model_params)
+    model.fit(X[train_idx], y[train_idx])
+    results = evaluate_model(model, X[train_idx], X[test_idx], y[train_idx], y[test_idx], verbose=False)
+    results['repeat'] = repeat
+    results['fold'] = fold
+    return results
+
+
+def _run_fold(model_class, model_params, n_splits, repeat, fold, seed):
+    return _evaluate_fold(_worker_X, _worker_y, model_class, model_params, n_splits, repeat, fold, seed)
+
+
+# run (repeated) K-fold cross validation
+# model_class is LinearRegressionScratch, LinearRegressionSklearn, or anything else with fit/predict,
+# built fresh for every fold as model_class(**model_params)
+# n_jobs = number of worker processes (None = one per CPU core, 1 = no extra processes at all)
+# returns the evaluate_model numbers for every fold plus their mean and standard deviation
+def cross_validate(model_class, X, y, model_params=None, n_splits=5, n_repeats=1,
+                   n_jobs=None, random_state=None):
+    X = np.asarray(X)
+    y = np.asarray(y)
+    if n_splits < 2 or n_splits > len(y):
+        raise ValueError(f"n_splits must be between 2 and the number of rows ({len(y)}), got {n_splits}")
+    model_params = model_params or {}
+    # workers need the same seed to rebuild the same folds, so a missing one is drawn once here
+    seed = random_state if random_state is not None else int(np.random.SeedSequence().entropy % 2**32)
+    tasks = [(repeat, fold) for repeat in range(n_repeats) for fold in range(n_splits)]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(tasks))
+
+    if n_jobs == 1:
+        folds = [_evaluate_fold(X, y, model_class, model_params, n_splits, repeat, fold, seed)
+                 for repeat, fold in tasks]
+    else:
+        X_shm, X_spec = share_array(X)
+        y_shm, y_spec = share_array(y)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(X_spec, y_spec)) as pool:
+                futures = [pool.submit(_run_fold, model_class, model_params, n_splits, repeat, fold, seed)
+                           for repeat, fold in tasks]
+                folds = [future.result() for future in futures]
+        finally:
+            for shm in (X_shm, y_shm):
+                shm.close()
+                shm.unlink()
+
+    metrics = [key for key in folds[0] if key not in ('repeat', 'fold')]
+    return {
+        'folds': folds,
+        'mean': {key: float(np.mean([result[key] for result in folds])) for key in metrics},
+        'std': {key: float(np.std([result[key] for result in folds])) for key in metrics},
+    }
@@ -0,0 +1,157 @@
+#loads the California housing data through a local cache
+# fetch_california_housing() unpacks (and the first time downloads) the dataset on every run
+# here it's saved once as plain .npy files that can be memory-mapped, so later runs just open the files
+    # X.npy is stored column by column (Fortran order), so reading one feature reads one contiguous block
+    # the cache folder name includes a hash of the data, so a changed dataset never mixes with an old one
+    # a small manifest (california_housing.json) points at the current folder
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+DATASET_NAME = "california_housing"
+CACHE_FORMAT_VERSION = 1
+# where the cache lives, HOUSING_CACHE_DIR overrides it
+DEFAULT_CACHE_DIR = os.environ.get(
+    "HOUSING_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache"))
+
+
+# the dataset as numpy arrays, with the pandas pieces only built when someone asks for them
+# (importing pandas and building a DataFrame is the slow part of "loading" a dataset this small)
+class HousingDataset:
+
+    def __init__(self, X, y, feature_names, content_hash=None):
+        self.X = X
+        self.y = y
+        self.feature_names = list(feature_names)
+        self.content_hash = content_hash
+        self._frame = None
+
+    # features + a 'Target' column, built the first time it's used
+    @property
+    def frame(self):
+        if self._frame is None:
+            import pandas as pd
+            self._frame = pd.DataFrame(np.asarray(self.X), columns=self.feature_names)
+            self._frame['Target'] = np.asarray(self.y)
+        return self._frame
+
+    # summary statistics table (count, mean, std, min, quartiles, max)
+    def describe(self):
+        return self.frame.describe()
+
+
+# hash of the actual numbers (plus the column names), used as the cache folder name
+def content_hash(X, y, feature_names):
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(feature_names)).encode())
+    for array in (X, y):
+        array = np.asarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        # Fortran order to match how X is stored on disk
+        digest.update(np.asfortranarray(array).tobytes(order='F'))
+    return digest.hexdigest()
+
+
+def _manifest_path(cache_dir, name):
+    return os.path.join(cache_dir, f"{name}.json")
+
+
+# save arrays into the cache and point the manifest at them
+# writes into a temporary folder first and renames it at the end, so a crash never leaves half a cache
+def save_to_cache(X, y, feature_names, cache_dir=DEFAULT_CACHE_DIR, name=DATASET_NAME):
+    digest = content_hash(X, y, feature_names)
+    folder = f"{name}-{digest[:16]}"
+    target = os.path.join(cache_dir, folder)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    if not os.path.isdir(target):
+        tmp = tempfile.mkdtemp(dir=cache_dir, prefix=f".{folder}-")
+        try:
+            np.save(os.path.join(tmp, "X.npy"), np.asfortranarray(X))
+            np.save(os.path.join(tmp, "y.npy"), np.ascontiguousarray(y))
+            os.replace(tmp, target)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'name': name,
+        'hash': digest,
+        'folder': folder,
+        'feature_names': list(feature_names),
+        'n_samples': int(np.shape(X)[0]),
+        'n_features': int(np.shape(X)[1]),
+    }
+    tmp_manifest = _manifest_path(cache_dir, name) + ".tmp"
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, _manifest_path(cache_dir, name))
+    return target
+
+
+# open a cached dataset, or return None when it isn't there
+# mmap=True maps the files instead of reading them (the OS loads pages as they're touched)
+# verify=True re-hashes the data and fails if the files were changed or damaged
+def load_from_cache(cache_dir=DEFAULT_CACHE_DIR, name=DATASET_NAME, mmap=True, verify=False):
+    try:
+        with open(_manifest_path(cache_dir, name)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        return None
+
+    folder = os.path.join(cache_dir, manifest['folder'])
+    mmap_mode = 'r' if mmap else None
+    try:
+        X = np.load(os.path.join(folder, "X.npy"), mmap_mode=mmap_mode)
+        y = np.load(os.path.join(folder, "y.npy"), mmap_mode=mmap_mode)
+    except FileNotFoundError:
+        return None
+
+    if verify and content_hash(X, y, manifest['feature_names']) != manifest['hash']:
+        raise ValueError(f"cached dataset in {folder} does not match its hash, delete it to re-download")
+    return HousingDataset(X, y, manifest['feature_names'], manifest['hash'])
+
+
+def _download_california_housing():
+    import ssl
+    import certifi
+    from sklearn.datasets import fetch_california_housing
+
+    # Fix SSL certificate verification issue on macOS
+    # Configure SSL to use certifi's certificate bundle for HTTPS connections
+    # ssl._create_default_https_context is called whenever python makes an https connection
+    # it's only swapped for the download and put back afterwards
+    original_context = ssl._create_default_https_context
+    ssl._create_default_https_context = lambda: ssl.create_default_context(cafile=certifi.where())
+    try:
+        housing = fetch_california_housing()
+    finally:
+        ssl._create_default_https_context = original_context
+    return housing.data, housing.target, housing.feature_names
+
+
+# the California housing data, from the local cache when possible
+# offline=True (or HOUSING_OFFLINE=1) never touches the network: a missing cache is an error instead
+def load_california_housing(cache_dir=DEFAULT_CACHE_DIR, offline=None, mmap=True, verify=False):
+    if offline is None:
+        offline = os.environ.get("HOUSING_OFFLINE", "") not in ("", "0")
+
+    dataset = load_from_cache(cache_dir, mmap=mmap, verify=verify)
+    if dataset is not None:
+        return dataset
+    if offline:
+        raise FileNotFoundError(
+            f"no cached {DATASET_NAME} dataset in {cache_dir} and offline mode is on; "
+            "run once with network access to fill the cache")
+
+    X, y, feature_names = _download_california_housing()
+    save_to_cache(X, y, feature_names, cache_dir)
+    return load_from_cache(cache_dir, mmap=mmap)
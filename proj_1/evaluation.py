@@ -0,0 +1,129 @@
+#scoring one or more trained models on the same data in a single pass
+# the old way (evaluate_model with sklearn.metrics) predicted, then made one call per metric,
+# and every call went over the whole prediction array again; main.py then predicted X_test a second time to plot it
+# here X is read one chunk of rows at a time, every model predicts that chunk, and all the metrics are
+# updated from the chunk's residuals right away:
+    # MSE, RMSE, MAE, R^2 and residual mean / std / largest miss
+# the predictions are kept and handed back with the metrics, so nobody has to predict again
+
+import numpy as np
+
+DEFAULT_CHUNK_ROWS = 65536
+
+
+# running sums for k models scored against the same targets, updated one chunk at a time
+# everything is a length-k array (one slot per model), so a chunk is a few whole-array operations
+# y is shifted by the first chunk's mean before squaring, so sum((y - mean)^2) doesn't lose digits
+# the way sum(y^2) - n * mean^2 would for big prices
+class MetricAccumulator:
+
+    def __init__(self, n_models):
+        self.count = 0
+        self.shift = None
+        self.y_sum = 0.0
+        self.y_squares = 0.0
+        self.residual_sum = np.zeros(n_models)
+        self.squared_error = np.zeros(n_models)
+        self.absolute_error = np.zeros(n_models)
+        self.max_abs_error = np.zeros(n_models)
+
+    # y_chunk: (m,) targets, predictions: (m, k), one column per model
+    def update(self, y_chunk, predictions):
+        y_chunk = np.asarray(y_chunk, dtype=np.float64)
+        if len(y_chunk) == 0:
+            return self
+        if self.shift is None:
+            self.shift = float(np.mean(y_chunk))
+        y_shifted = y_chunk - self.shift
+        self.count += len(y_chunk)
+        self.y_sum += float(np.sum(y_shifted))
+        self.y_squares += float(np.dot(y_shifted, y_shifted))
+
+        # residuals of every model at once, reused for all the sums below
+        residuals = np.subtract(predictions, y_chunk[:, None], dtype=np.float64)
+        self.residual_sum += np.sum(residuals, axis=0)
+        self.squared_error += np.einsum('ij,ij->j', residuals, residuals)
+        np.abs(residuals, out=residuals)
+        self.absolute_error += np.sum(residuals, axis=0)
+        np.maximum(self.max_abs_error, np.max(residuals, axis=0), out=self.max_abs_error)
+        return self
+
+    # one dict of metrics per model
+    def results(self):
+        n = self.count
+        if n == 0:
+            raise ValueError("no rows were evaluated")
+        mse = self.squared_error / n
+        total_variation = self.y_squares - self.y_sum ** 2 / n
+        residual_mean = self.residual_sum / n
+        # variance of the residuals = mean square - square of the mean
+        residual_var = np.maximum(mse - residual_mean ** 2, 0.0)
+        r2 = 1 - self.squared_error / total_variation if total_variation > 0 else np.full_like(mse, np.nan)
+        return [{
+            'mse': float(mse[j]),
+            'rmse': float(np.sqrt(mse[j])),
+            'mae': float(self.absolute_error[j] / n),
+            'r2': float(r2[j]),
+            'residual_mean': float(residual_mean[j]),
+            'residual_std': float(np.sqrt(residual_var[j])),
+            'max_abs_error': float(self.max_abs_error[j]),
+        } for j in range(len(mse))]
+
+
+# score every model on (X, y) in one sweep over the rows
+# models: a dict of name -> model (or a list, then the names are 0, 1, ...), anything with predict() works
+# returns name -> metrics dict, with the full predictions under 'predictions' when return_predictions is on
+def evaluate(models, X, y, chunk_rows=DEFAULT_CHUNK_ROWS, return_predictions=True):
+    if not isinstance(models, dict):
+        models = dict(enumerate(models))
+    names = list(models)
+    y = np.asarray(y)
+    n_rows = len(y)
+    if len(X) != n_rows:
+        raise ValueError(f"X has {len(X)} rows but y has {n_rows}")
+
+    accumulator = MetricAccumulator(len(names))
+    # every model's predictions as one column, written chunk by chunk (the chunk's columns feed the metrics)
+    # without return_predictions only one chunk's worth is kept
+    all_predictions = np.empty((n_rows if return_predictions else min(chunk_rows, n_rows), len(names)))
+    for start in range(0, n_rows, chunk_rows):
+        stop = min(start + chunk_rows, n_rows)
+        block = all_predictions[start:stop] if return_predictions else all_predictions[:stop - start]
+        X_chunk = X[start:stop]
+        for j, name in enumerate(names):
+            block[:, j] = models[name].predict(X_chunk)
+        accumulator.update(y[start:stop], block)
+
+    results = {}
+    for j, (name, metrics) in enumerate(zip(names, accumulator.results())):
+        if return_predictions:
+            # a copy, so each model's predictions are one contiguous array
+            metrics['predictions'] = all_predictions[:, j].copy()
+        results[name] = metrics
+    return results
+
+
+# train and test metrics for several models, keyed like evaluate_model's results:
+    # train_mse, test_mse, train_r2, test_r2, plus train_/test_ rmse, mae and the residual numbers
+    # and test_predictions / train_predictions when return_predictions is on
+def evaluate_split(models, X_train, X_test, y_train, y_test, chunk_rows=DEFAULT_CHUNK_ROWS,
+                   return_predictions=True):
+    results = {}
+    for prefix, X, y in (("train", X_train, y_train), ("test", X_test, y_test)):
+        for name, metrics in evaluate(models, X, y, chunk_rows, return_predictions).items():
+            combined = results.setdefault(name, {})
+            for key, value in metrics.items():
+                combined[f"{prefix}_{key}"] = value
+    return results
+
+
+def print_results(model_name, results):
+    print(f"\n{model_name} Results:")
+    print("-" * 40)
+    print(f"Training MSE: {results['train_mse']:.4f}")
+    print(f"Testing MSE:  {results['test_mse']:.4f}")
+    print(f"Training R²:  {results['train_r2']:.4f}")
+    print(f"Testing R²:   {results['test_r2']:.4f}")
+    if 'test_mae' in results:
+        print(f"Testing RMSE: {results['test_rmse']:.4f}")
+        print(f"Testing MAE:  {results['test_mae']:.4f}")
@@ -50,6 +50,350 @@
 
 import numpy as np
 
+from batch_predict import predict_iter
+from callbacks import CallbackList, ProgressPrinter
+from model_io import LinearScorer, load_model, save_model
+from optimizers import make_optimizer
+from parallel import ShardedObjective
+from streaming import RunningMoments, iter_chunks
+
+
+# the ways fit() can find the weights
+    # "gd" is gradient descent (the iterative way, walking down the bowl)
+    # the rest jump straight to the bottom of the bowl with one linear algebra solve
+        # "normal": solve (X^T X) w = X^T y
+        # "cholesky": same equation, but factor X^T X = L L^T first (faster + checks it is positive definite)
+        # "qr": factor X = QR and solve R w = Q^T y (never forms X^T X, so it is more accurate)
+        # "lstsq": SVD based least squares, works even when columns are duplicates of each other
+SOLVERS = ("gd", "normal", "cholesky", "qr", "lstsq")
+
+# how gradient descent computes each step
+    # "data": multiply through every row of X on every iteration, O(n*d) per step
+    # "gram": compress X once into X^T X, X^T y and y^T y, then every step is O(d^2) no matter how many rows
+    # "parallel": like "data", but the rows are split into shards that worker processes go through at the same time
+        # (see parallel.py, n_jobs / blas_threads below)
+GRADIENT_MODES = ("data", "gram", "parallel")
+
+# how the learning rate shrinks as mini-batch training goes on (t = number of updates so far)
+    # "constant": learning_rate the whole time
+    # "inverse": learning_rate / (1 + lr_decay * t)
+    # "sqrt": learning_rate / sqrt(1 + lr_decay * t)
+# small noisy batches bounce around the bottom of the bowl, shrinking the step lets them settle
+LR_SCHEDULES = ("constant", "inverse", "sqrt")
+
+# learning_rate="auto" looks at the eigenvalues of the cost's Hessian (how sharply the bowl curves)
+# up to this many parameters it computes them exactly with eigvalsh, above it uses power iteration
+_EXACT_SPECTRUM_MAX_PARAMS = 500
+_POWER_ITERATIONS = 50
+
+# rows per block in predict (64k rows x 8 float64 features = a 4 MB buffer)
+_PREDICT_BLOCK_ROWS = 65536
+
+# sweep_gradient_descent calls a configuration diverged once its cost is this many times the starting cost
+# (a stable step size only ever lowers the cost of this quadratic, so growing at all means the step is too big)
+_DIVERGENCE_FACTOR = 10.0
+
+
+# the Hessian of the MSE cost for theta = [weights, bias]:
+    # [[ X^T X / m,  x_mean ],
+    #  [ x_mean^T,   1      ]]
+# it doesn't depend on theta at all (the bowl has the same shape everywhere)
+def _augmented_hessian(G, x_mean):
+    n_features = len(x_mean)
+    H = np.empty((n_features + 1, n_features + 1))
+    H[:-1, :-1] = G
+    H[:-1, -1] = x_mean
+    H[-1, :-1] = x_mean
+    H[-1, -1] = 1.0
+    return H
+
+
+# largest and smallest eigenvalue of the Hessian
+    # largest (L): the steepest the bowl ever curves. gradient descent is stable for steps below 2/L,
+        # and 1/L is the classic safe-and-fast choice
+    # smallest: the flattest direction. L / smallest is the condition number,
+        # roughly how many steps plain gradient descent needs (big = long skinny valley = slow)
+def hessian_spectrum(objective, n_params):
+    if n_params <= _EXACT_SPECTRUM_MAX_PARAMS:
+        eigenvalues = np.linalg.eigvalsh(objective.hessian())
+        return eigenvalues[-1], eigenvalues[0]
+
+    # power iteration: multiplying by H over and over turns any vector toward the top eigenvector
+    rng = np.random.default_rng(0)
+    v = rng.standard_normal(n_params)
+    for _ in range(_POWER_ITERATIONS):
+        v = objective.hessian_vector(v)
+        v /= np.linalg.norm(v)
+    largest = np.dot(v, objective.hessian_vector(v))
+
+    # same trick on (largest * I - H), whose top eigenvalue is largest - smallest
+    u = rng.standard_normal(n_params)
+    for _ in range(_POWER_ITERATIONS):
+        u = largest * u - objective.hessian_vector(u)
+        u /= np.linalg.norm(u)
+    smallest = largest - np.dot(u, largest * u - objective.hessian_vector(u))
+    return largest, smallest
+
+
+# the "objectives" below are the MSE cost written as a function of one flat vector
+# theta = [w1, ..., wd, bias], which is what the optimizers in optimizers.py work with
+# they all give the same numbers, they just get them from the data in different ways
+
+# straight from the (normalized) rows
+# every call writes its n-sized intermediate (the errors, or X.d) into one scratch array, work,
+# that is made once and reused, so a training loop allocates nothing the size of the data
+    # work can be passed in to share one buffer between many small objectives (see _run_epoch)
+class _DataObjective:
+
+    def __init__(self, X, y, work=None):
+        self.X = X
+        self.y = y
+        self.m = len(y)
+        self._work = np.empty(self.m, dtype=X.dtype) if work is None else work[:self.m]
+
+    # work = X.w + b (- y), with out= so numpy writes into the buffer instead of making new arrays
+    def _fill_work(self, theta, subtract_y=True):
+        work = self._work
+        # np.dot(out=) needs the exact result dtype, so the (tiny) weight vector is cast to X's
+        np.dot(self.X, theta[:-1].astype(work.dtype, copy=False), out=work)
+        work += theta[-1]
+        if subtract_y:
+            work -= self.y
+        return work
+
+    # X^T . work and sum(work), averaged over the rows: the gradient when work holds the errors
+    def _project_work(self, work):
+        out = np.empty(self.X.shape[1] + 1, dtype=work.dtype)
+        np.dot(self.X.T, work, out=out[:-1])
+        out[-1] = np.sum(work)
+        out /= self.m
+        return out
+
+    # one pass: compute the errors once and get both the cost and the gradient from them
+    # with_cost=False skips the cost (when it isn't going to be recorded)
+    def cost_and_gradient(self, theta, with_cost=True):
+        errors = self._fill_work(theta)
+        grad = self._project_work(errors)
+        cost = np.dot(errors, errors) / (2 * self.m) if with_cost else None
+        return cost, grad
+
+    def cost(self, theta):
+        errors = self._fill_work(theta)
+        return np.dot(errors, errors) / (2 * self.m)
+
+    # direction^T H direction, where H is the Hessian (the bowl's bend) of the MSE cost
+    # = (1/m) * |X.d_w + d_b|^2, one extra X.d product
+    def curvature(self, direction):
+        change = self._fill_work(direction, subtract_y=False)
+        return np.dot(change, change) / self.m
+
+    def hessian(self):
+        return _augmented_hessian(np.dot(self.X.T, self.X) / self.m, np.mean(self.X, axis=0))
+
+    # H . v without building H, two passes through X
+    def hessian_vector(self, v):
+        return self._project_work(self._fill_work(v, subtract_y=False))
+
+
+# from the gram summaries (see _compute_gram_stats), every call is O(d^2)
+class _GramObjective:
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    # same gradients as _compute_gradients
+        # dw = (1/m) X^T (Xw + b - y) = G w + b * x_mean - c
+        # db = (1/m) sum(Xw + b - y) = x_mean.w + b - y_mean
+    def cost_and_gradient(self, theta, with_cost=True):
+        stats = self.stats
+        weights, bias = theta[:-1], theta[-1]
+        Gw = np.dot(stats['G'], weights)
+        grad = np.empty_like(theta)
+        grad[:-1] = Gw + bias * stats['x_mean'] - stats['c']
+        grad[-1] = np.dot(stats['x_mean'], weights) + bias - stats['y_mean']
+        cost = self._cost(weights, bias, Gw) if with_cost else None
+        return cost, grad
+
+    def cost(self, theta):
+        weights = theta[:-1]
+        return self._cost(weights, theta[-1], np.dot(self.stats['G'], weights))
+
+    # same number as _compute_cost, but only d-sized algebra
+    def _cost(self, weights, bias, Gw):
+        stats = self.stats
+        cost = 0.5 * (np.dot(weights, Gw)
+                      + 2 * bias * np.dot(stats['x_mean'], weights)
+                      + bias ** 2
+                      - 2 * np.dot(stats['c'], weights)
+                      - 2 * bias * stats['y_mean']
+                      + stats['yy'])
+        # the subtraction can leave a tiny negative number from rounding when the fit is near perfect
+        return max(cost, 0.0)
+
+    def curvature(self, direction):
+        stats = self.stats
+        d_w, d_b = direction[:-1], direction[-1]
+        return (np.dot(d_w, np.dot(stats['G'], d_w))
+                + 2 * d_b * np.dot(stats['x_mean'], d_w)
+                + d_b ** 2)
+
+    def hessian(self):
+        return _augmented_hessian(self.stats['G'], self.stats['x_mean'])
+
+    def hessian_vector(self, v):
+        stats = self.stats
+        out = np.empty_like(v)
+        out[:-1] = np.dot(stats['G'], v[:-1]) + v[-1] * stats['x_mean']
+        out[-1] = np.dot(stats['x_mean'], v[:-1]) + v[-1]
+        return out
+
+
+# streamed from chunks that are normalized on the fly (see fit_chunks)
+# every call is one pass over all the chunks, adding up each chunk's share
+class _ChunkedObjective:
+
+    def __init__(self, model, chunks):
+        self.model = model
+        self.chunks = chunks
+        # every chunk is normalized into the same buffer (grown to the biggest chunk seen)
+        self._X_buffer = None
+        self._work = None
+
+    def _normalized_chunks(self):
+        n_rows = 0
+        for X_chunk, y_chunk in iter_chunks(self.chunks):
+            X_chunk = np.asarray(X_chunk)
+            y_chunk = np.asarray(y_chunk, dtype=self.model.dtype)
+            k = len(y_chunk)
+            if self._X_buffer is None or len(self._X_buffer) < k:
+                self._X_buffer = np.empty((k, X_chunk.shape[1]), dtype=self.model.dtype)
+                self._work = np.empty(k, dtype=self.model.dtype)
+            n_rows += k
+            yield self.model._normalize_features(X_chunk, out=self._X_buffer[:k]), y_chunk
+        if n_rows == 0:
+            raise ValueError("chunks ran out after the first pass, pass a list or a function instead of a generator")
+
+    # the same chunks as _DataObjectives sharing one scratch buffer
+    def _chunk_objectives(self):
+        for X, y in self._normalized_chunks():
+            yield _DataObjective(X, y, self._work)
+
+    # each chunk's averages are weighted by its number of rows, then divided by the total
+    def cost_and_gradient(self, theta, with_cost=True):
+        grad = np.zeros_like(theta)
+        squared_error_sum, m = 0.0, 0
+        for part in self._chunk_objectives():
+            errors = part._fill_work(theta)
+            grad += part._project_work(errors) * part.m
+            squared_error_sum += np.dot(errors, errors)
+            m += part.m
+        grad /= m
+        return (squared_error_sum / (2 * m) if with_cost else None), grad
+
+    def cost(self, theta):
+        squared_error_sum, m = 0.0, 0
+        for part in self._chunk_objectives():
+            squared_error_sum += part.cost(theta) * part.m
+            m += part.m
+        return squared_error_sum / m
+
+    def curvature(self, direction):
+        total, m = 0.0, 0
+        for part in self._chunk_objectives():
+            total += part.curvature(direction) * part.m
+            m += part.m
+        return total / m
+
+    # one pass to add up X^T X chunk by chunk
+    def hessian(self):
+        G, x_sum, m = 0.0, 0.0, 0
+        for X, _ in self._normalized_chunks():
+            G = G + np.dot(X.T, X)
+            x_sum = x_sum + np.sum(X, axis=0)
+            m += len(X)
+        return _augmented_hessian(G / m, x_sum / m)
+
+    def hessian_vector(self, v):
+        out, m = np.zeros_like(v), 0
+        for part in self._chunk_objectives():
+            out += part.hessian_vector(v) * part.m
+            m += part.m
+        return out / m
+
+
+# recursive least squares, the state behind LinearRegressionScratch.update
+# keeps theta = [weights, bias] and P = (A^T A)^-1 for everything seen so far (A = normalized rows plus a column of 1s)
+# a new batch of k rows moves both to the exact least squares answer for old + new rows without revisiting old rows:
+    # O(k * d^2) for a small batch (Woodbury identity, only a k x k system is solved)
+    # O(d^3 + k * d^2) for a big one (add the batch to the inverse of P and invert back)
+# forgetting < 1 shrinks the weight of every older row by that factor per new row (exponential forgetting),
+# so the answer follows prices that drift over time
+# everything here stays float64, the model's weights are cast to its dtype afterwards
+class _RecursiveLeastSquares:
+
+    # P starts as I / ridge: a very weak pull toward theta = 0 that keeps the first updates solvable
+    # (before d + 1 rows have arrived, A^T A alone has no inverse)
+    def __init__(self, n_params, ridge=1e-8):
+        self.theta = np.zeros(n_params)
+        self.P = np.eye(n_params) / ridge
+        self.n_updates = 0
+
+    # continue from an earlier fit instead of from zero: theta is its answer and information is its A^T A,
+    # so the next update lands where it would if those rows had gone through update one by one
+    # the same ridge keeps P solvable when the fit's columns were rank deficient
+    @classmethod
+    def from_fit(cls, theta, information, ridge=1e-8):
+        rls = cls(len(theta), ridge)
+        rls.theta = np.array(theta, dtype=np.float64)
+        P = np.linalg.inv(information + ridge * np.eye(len(theta)))
+        rls.P = (P + P.T) / 2
+        rls.n_updates = int(round(information[-1, -1]))
+        return rls
+
+    def update(self, A, y, forgetting=1.0):
+        k = len(y)
+        # the older rows lose forgetting^k, the new rows forgetting^(rows that came after them)
+        row_weights = forgetting ** np.arange(k - 1, -1, -1, dtype=np.float64)
+        P = self.P / forgetting ** k
+        residual = y - np.dot(A, self.theta)
+
+        PAt = np.dot(P, A.T)
+        if k == 1:
+            # one row: the k x k system is a single number, the classic RLS update
+            gain = PAt / (np.dot(A[0], PAt[:, 0]) + 1.0)
+            P = P - np.outer(gain[:, 0], PAt[:, 0])
+        elif k <= len(self.theta):
+            # Woodbury: (P^-1 + A^T W A)^-1 = P - P A^T (W^-1 + A P A^T)^-1 A P
+            S = np.dot(A, PAt)
+            S[np.diag_indices(k)] += 1.0 / row_weights
+            gain = np.linalg.solve(S, PAt.T).T
+            P = P - np.dot(gain, PAt.T)
+        else:
+            information = np.linalg.inv(P) + np.dot(A.T * row_weights, A)
+            P = np.linalg.inv(information)
+            gain = np.dot(P, A.T) * row_weights
+        # the old theta already minimizes the old rows' error, so only the new rows' residuals move it
+        self.theta = self.theta + np.dot(gain, residual)
+        # rounding slowly makes P lopsided, keep it exactly symmetric
+        self.P = (P + P.T) / 2
+        self.n_updates += k
+
+    # re-express the state after the normalization changed from (old_mean, old_std) to (new_mean, new_std)
+    # for one row: z_old = z_new * scale + shift, with scale = new_std / old_std and shift = (new_mean - old_mean) / old_std
+    # so [z_old, 1] = T [z_new, 1], the predictions stay the same with theta_new = T^T theta_old,
+    # and P_new = T^T P_old T
+    # T is a diagonal plus one column, so this is O(d^2) without ever building T
+    def change_normalization(self, scale, shift):
+        def times_T(M):
+            out = M.copy()
+            out[:, :-1] *= scale
+            out[:, -1] = np.dot(M[:, :-1], shift) + M[:, -1]
+            return out
+
+        self.P = times_T(times_T(self.P).T)
+        weights = self.theta[:-1]
+        self.theta = np.append(weights * scale, np.dot(weights, shift) + self.theta[-1])
+
 
 class LinearRegressionScratch:
 
@@ -58,11 +402,70 @@ class LinearRegressionScratch:
     #y=mx+b
     #weights are 'm' the slope
     #bias is b 
-    def __init__(self, learning_rate=0.01, n_iterations=1000):
+    def __init__(self, learning_rate=0.01, n_iterations=1000, solver="gd", gradient_mode="data",
+                 batch_size=None, shuffle=True, lr_schedule="constant", lr_decay=0.01,
+                 random_state=None, tol=None, patience=1, stop_on="cost", cost_every=1, verbose=False,
+                 optimizer="gd", dtype=np.float64, n_jobs=None, blas_threads=None):
+        if solver not in SOLVERS:
+            raise ValueError(f"solver must be one of {SOLVERS}, got {solver!r}")
+        if gradient_mode not in GRADIENT_MODES:
+            raise ValueError(f"gradient_mode must be one of {GRADIENT_MODES}, got {gradient_mode!r}")
+        if lr_schedule not in LR_SCHEDULES:
+            raise ValueError(f"lr_schedule must be one of {LR_SCHEDULES}, got {lr_schedule!r}")
+        if stop_on not in ("cost", "gradient"):
+            raise ValueError(f"stop_on must be 'cost' or 'gradient', got {stop_on!r}")
+        if batch_size is not None and (solver != "gd" or gradient_mode != "data"):
+            raise ValueError("batch_size only works with solver='gd' and gradient_mode='data'")
+        if not np.issubdtype(np.dtype(dtype), np.floating):
+            raise ValueError(f"dtype must be a floating point type like np.float32 or np.float64, got {dtype!r}")
         #learning rate is step size. how big a step (correction) should be taken to correct a wrong output
+        # "auto" picks 1/L from the data, L being the largest eigenvalue of the Hessian (see hessian_spectrum)
         self.learning_rate = learning_rate
+        #the learning rate actually used (the number "auto" picked), plus what it was based on
+        self.learning_rate_ = None
+        self.lipschitz_ = None
+        self.condition_number_ = None
+        #the update rule for each gradient descent step: a name from optimizers.OPTIMIZERS
+        # ("gd", "momentum", "nesterov", "adam", "line_search", "lbfgs") or an Optimizer object
+        self.optimizer = optimizer
         #how many times to loop the updating process (for gradient descent)
         self.n_iterations = n_iterations
+        #which method fit() uses to find the weights (see SOLVERS above)
+        self.solver = solver
+        #how each gradient descent step is computed (see GRADIENT_MODES above)
+        self.gradient_mode = gradient_mode
+        #gradient_mode="parallel" only: number of worker processes / row shards (None = one per CPU core)
+        # and how many BLAS threads each worker may use (None = BLAS decides, 1 is usually best with many workers)
+        self.n_jobs = n_jobs
+        self.blas_threads = blas_threads
+        #mini-batch mode: how many rows each step looks at (None = all rows, plain gradient descent)
+        # with a batch_size, n_iterations counts epochs (full passes over the data) instead of steps
+        self.batch_size = batch_size
+        #reshuffle the row order at the start of every epoch
+        self.shuffle = shuffle
+        #how the learning rate shrinks over time (see LR_SCHEDULES above)
+        self.lr_schedule = lr_schedule
+        self.lr_decay = lr_decay
+        #seed for the shuffling so runs can be repeated
+        self.random_state = random_state
+        #early stopping: stop once the cost improves by less than tol (or the gradient is shorter than tol)
+        # patience times in a row. tol=None always runs all n_iterations
+        self.tol = tol
+        self.patience = patience
+        self.stop_on = stop_on
+        #only measure the cost every cost_every steps (the last step is always measured)
+        self.cost_every = cost_every
+        #print the cost every 100 steps (adds a callbacks.ProgressPrinter to every fit)
+        self.verbose = verbose
+        #the number type used for everything: the input copies, the normalized data, the weights, the predictions
+        # np.float32 takes half the memory of np.float64 and so half the time to read through big arrays,
+        # at ~7 significant digits instead of ~16 (plenty for normalized housing data)
+        self.dtype = np.dtype(dtype)
+        #how many iterations actually ran, and whether early stopping kicked in
+        self.n_iter_ = 0
+        self.converged_ = False
+        #the solver that actually produced the weights (can be "lstsq" if the requested one gave up)
+        self.solver_ = None
         #a weight for each feature
 
         self.weights = None
@@ -75,20 +478,62 @@ class LinearRegressionScratch:
         self._mean = None
         self._std = None
 
+        #mini-batch state that has to survive between partial_fit calls
+        # _t is the number of updates done so far (drives the learning rate schedule)
+        self._t = 0
+        self._rng = None
+        self._optimizer = None
+
+        #online (recursive least squares) state that has to survive between update calls
+        # the solver state plus the running mean / std of every row update has seen
+        self._rls = None
+        self._rls_moments = None
+        self._rls_std = None
+        # A^T A of the rows fit() trained on (A = normalized rows plus a column of 1s), so the first update
+        # continues from the fit instead of throwing it away (None when there is no fit to continue from)
+        self._fit_information = None
+
     #normalization function (Z score normalization) 
     # transforms features so the mean is 0 and standard deviation is 1
     # z = X- mu / stddev, its the same function in stats class
-    def _normalize_features(self, X, fit=False):
+    # out: an existing array to write the result into (and convert the dtype on the way) instead of a new one
+    def _normalize_features(self, X, fit=False, out=None):
+        if out is not None:
+            np.subtract(X, self._mean, out=out)
+            out /= self._std
+            return out
+        # no copy when X already has the right dtype
+        X = np.asarray(X, dtype=self.dtype)
         #only fitting (calculating mean or standard deviation) for training data
         if fit:
-            #calculate the average of columns (axis = 0), columns are the features
-            self._mean = np.mean(X, axis=0)
-            #calculate the standard deviation of columns
-            self._std = np.std(X, axis=0)
-            self._std[self._std == 0] = 1 #if the standard deviation is zero, hard code it to be 1 so there are no errors
-            
-        #returns the z score calculation
-        return (X - self._mean) / self._std
+            # the centered copy the std was computed from becomes the result
+            X_normalized = self._fit_moments(X)
+        else:
+            #returns the z score calculation
+            # X - mean makes the one new array, the division then happens inside it
+            X_normalized = X - self._mean
+        X_normalized /= self._std
+        return X_normalized
+
+    # calculate and store the mean and standard deviation of X's columns, returns X - mean
+    def _fit_moments(self, X):
+        #calculate the average of columns (axis = 0), columns are the features
+        # the sums are done in float64 even for float32 data, so rounding doesn't pile up over many rows
+        mean = np.mean(X, axis=0, dtype=np.float64)
+        self._set_moments(mean, np.ones_like(mean))
+        X_centered = X - self._mean
+        #calculate the standard deviation of columns from the centered values
+        # einsum adds up the squares column by column in float64 without a float64 copy of X
+        # (np.std(X, dtype=np.float64) would build one, twice the size of float32 X)
+        std = np.sqrt(np.einsum('ij,ij->j', X_centered, X_centered, dtype=np.float64) / len(X))
+        std[std == 0] = 1 #if the standard deviation is zero, hard code it to be 1 so there are no errors
+        self._set_moments(mean, std)
+        return X_centered
+
+    # store the mean / std in the model's dtype, so normalizing never turns float32 data into float64
+    def _set_moments(self, mean, std):
+        self._mean = np.asarray(mean, dtype=self.dtype)
+        self._std = np.asarray(std, dtype=self.dtype)
         
     #calculates the (MSE) mean squared error
     # "how bad are the current weights?"
@@ -133,75 +578,517 @@ class LinearRegressionScratch:
         #returns the list of weight slopes, and single bias slope 
         return dw, db
 
+    # the cost is a quadratic, so everything it needs from the data fits in a few small summaries
+    # expanding (1/2m) * sum((X.w + b - y)^2) gives:
+        # (1/2) * (w^T G w + 2b * x_mean.w + b^2 - 2 c.w - 2b * y_mean + yy)
+        # where G = X^T X / m (d x d), c = X^T y / m (d), yy = y.y / m (one number)
+    # these are computed once before the loop, so the loop never touches the n rows again
+    def _compute_gram_stats(self, X, y):
+        m = len(y)
+        return {
+            'G': np.dot(X.T, X) / m,
+            'c': np.dot(X.T, y) / m,
+            'yy': np.dot(y, y) / m,
+            'x_mean': np.mean(X, axis=0),
+            'y_mean': np.mean(y),
+        }
+
+    # A^T A for normalized X with a column of 1s, always float64 (the update state is float64)
+    # built from gram-mode style summaries G = X^T X / m and x_mean, which fit already has, so this is O(d^2)
+    # the bottom right entry is the number of rows
+    def _compute_fit_information(self, m, G, x_mean):
+        G = np.asarray(G, dtype=np.float64)
+        x_mean = np.asarray(x_mean, dtype=np.float64)
+        return _augmented_hessian(G, x_mean) * m
+
+    # closed form solution (no loop)
+    # normalized columns all have mean 0, so the bias and weights don't affect each other:
+        # the best bias is just the average price
+        # the weights solve the least squares problem for the centered prices (y - mean)
+    # returns X^T X (d x d), which every solver gets along the way (qr as R^T R), for update() to continue from
+    def _solve_direct(self, X, y):
+        self.bias = np.mean(y, dtype=np.float64).astype(self.dtype)
+        y_centered = y - self.bias
+        # the smallest relative pivot we trust before calling X "rank deficient"
+        # (duplicate / constant columns make the system singular, so there's no unique answer)
+        # scaled by the number of features only: more rows don't make the d x d system any less solvable,
+        # and a threshold growing with n would send big well-conditioned float32 fits to the slow SVD
+        eps = np.finfo(X.dtype).eps * max(X.shape[1], 1)
+
+        solver = self.solver
+        if solver in ("normal", "cholesky"):
+            # X^T X is only d x d (8 x 8 for housing), this is the one pass over the data
+            gram = np.dot(X.T, X)
+            rhs = np.dot(X.T, y_centered)
+            # squaring X squares its condition number, so check the gram matrix is still solvable
+            if np.linalg.cond(gram) * eps >= 1:
+                solver = "lstsq"
+            elif solver == "normal":
+                self.weights = np.linalg.solve(gram, rhs)
+            else:
+                try:
+                    # gram = L L^T, then two triangular solves: L z = rhs, L^T w = z
+                    L = np.linalg.cholesky(gram)
+                    z = np.linalg.solve(L, rhs)
+                    self.weights = np.linalg.solve(L.T, z)
+                except np.linalg.LinAlgError:
+                    # not positive definite -> some columns are linear combinations of others
+                    solver = "lstsq"
+        elif solver == "qr":
+            # X = QR, Q has orthonormal columns, R is a small upper triangular matrix
+            Q, R = np.linalg.qr(X)
+            # Q^T Q = I, so X^T X = R^T R for free
+            gram = np.dot(R.T, R)
+            diag = np.abs(np.diag(R))
+            if diag.size == 0 or diag.min() <= eps * diag.max():
+                solver = "lstsq"
+            else:
+                self.weights = np.linalg.solve(R, np.dot(Q.T, y_centered))
+
+        if solver == "lstsq":
+            # SVD based, gives the minimum norm answer when there are many equally good ones
+            self.weights = np.linalg.lstsq(X, y_centered, rcond=None)[0]
+            if self.solver == "lstsq":
+                # asked for directly, so no gram yet (a fallback reuses the one it already has)
+                gram = np.dot(X.T, X)
+
+        self.solver_ = solver
+        return gram
+
+    # the learning rate for the next update, following lr_schedule
+    def _scheduled_learning_rate(self):
+        if self.lr_schedule == "inverse":
+            return self.learning_rate_ / (1 + self.lr_decay * self._t)
+        if self.lr_schedule == "sqrt":
+            return self.learning_rate_ / np.sqrt(1 + self.lr_decay * self._t)
+        return self.learning_rate_
+
+    # one pass (epoch) of mini-batch gradient descent over already normalized data
+    # instead of copying and shuffling X, shuffle a list of row numbers and read the rows through it
+    # each batch is copied into the same batch_size buffers every step, nothing new gets allocated per batch
+    # objective: a _DataObjective for (X, y) to measure the end-of-epoch cost with (made here if not given)
+    def _run_epoch(self, X, y, objective=None):
+        n_samples = X.shape[0]
+        batch_size = min(self.batch_size or n_samples, n_samples)
+        order = self._rng.permutation(n_samples) if self.shuffle else None
+        X_batch = np.empty((batch_size, X.shape[1]), dtype=X.dtype)
+        y_batch = np.empty(batch_size, dtype=y.dtype)
+        work = np.empty(batch_size, dtype=X.dtype)
+
+        theta = np.append(self.weights, self.bias)
+        for start in range(0, n_samples, batch_size):
+            stop = min(start + batch_size, n_samples)
+            if order is None:
+                # no shuffling: the batch is just a slice (a view, no copy at all)
+                batch = _DataObjective(X[start:stop], y[start:stop], work)
+            else:
+                rows = order[start:stop]
+                # mode='clip' lets take() write straight into the buffer (the default mode goes through a temporary)
+                batch = _DataObjective(np.take(X, rows, axis=0, out=X_batch[:stop - start], mode='clip'),
+                                       np.take(y, rows, out=y_batch[:stop - start], mode='clip'), work)
+            # gradient on just this batch, it's a noisy estimate of the full gradient
+            _, grad = batch.cost_and_gradient(theta, with_cost=False)
+            self._optimizer.learning_rate = self._scheduled_learning_rate()
+            theta = self._optimizer.step(theta, None, grad).astype(self.dtype, copy=False)
+            self._t += 1
+        self.weights, self.bias = theta[:-1], theta[-1]
+
+        # one cost per epoch, measured on all the rows of this pass
+        if objective is None:
+            objective = _DataObjective(X, y)
+        return objective.cost(theta)
+
+    # early stopping, called once per iteration (or epoch)
+    # stop_on="cost": count checks where the cost didn't beat the best cost so far by more than tol
+    # stop_on="gradient": count iterations where the gradient's length is below tol (the bowl is flat here)
+    # stop once that happens patience times in a row
+    # cost is None on iterations where the cost wasn't measured (cost_every > 1), those don't count either way
+    def _check_convergence(self, cost, grad_norm):
+        if self.tol is None:
+            return False
+
+        if self.stop_on == "gradient":
+            stalled = grad_norm < self.tol
+        elif cost is None:
+            return False
+        else:
+            stalled = cost > self._best_cost - self.tol
+            self._best_cost = min(self._best_cost, cost)
+
+        self._n_stalled = self._n_stalled + 1 if stalled else 0
+        self.converged_ = self._n_stalled >= self.patience
+        return self.converged_
+
+    # full-batch training loop shared by fit and fit_chunks
+    # the optimizer decides each step, the objective supplies the cost and gradient
+    # every step is one cost_and_gradient call at the new weights: its gradient drives the next step,
+    # and its cost is the score of the step just taken
+    # hooks: the CallbackList made by _make_hooks, told about every step
+    def _run_full_batch(self, objective, hooks):
+        theta = np.append(self.weights, self.bias)
+        cost, grad = objective.cost_and_gradient(theta)
+
+        #loop that runs an "iterations" number of times
+        # each iteration is 1 step of learning
+        for i in range(self.n_iterations):
+            # updating step
+            # subtracting the gradient means going down hill which is minimizing error
+            # the optimizer decides how far, plain gd does theta - learning_rate * grad
+            # the optimizer's own state is float64, cast back so the next X.theta stays in the model's dtype
+            # (a float64 theta would make numpy convert all of X to float64 on every step)
+            theta = self._optimizer.step(theta, cost, grad, objective).astype(self.dtype, copy=False)
+            self.n_iter_ = i + 1
+
+            # calculate MSE (cost) and save it, only every cost_every steps (and always on the last one)
+            # MSE acts as a score for how well the model adjusted by the new weights
+            record = (i + 1) % self.cost_every == 0 or i + 1 == self.n_iterations
+            # line searches compare costs, so they always need it
+            with_cost = record or self._optimizer.needs_full_batch
+            cost, grad = objective.cost_and_gradient(theta, with_cost=with_cost)
+            if record:
+                self.cost_history.append(cost)
+            grad_norm = np.sqrt(np.dot(grad, grad))
+            # the callbacks see the weights of this step (with verbose, a ProgressPrinter prints every 100 steps)
+            if hooks.callbacks:
+                self.weights, self.bias = theta[:-1], theta[-1]
+            hooks.iteration_end(self, i + 1, cost if record else None, grad_norm)
+
+            # stop early once the cost has stopped dropping (or the slope is basically flat)
+            if self._check_convergence(cost if record else None, grad_norm):
+                # make sure the history ends with the final weights' cost
+                if not record:
+                    self.cost_history.append(cost if cost is not None else objective.cost(theta))
+                break
+
+        self.weights, self.bias = theta[:-1], theta[-1]
+        hooks.fit_end(self, self.n_iter_, self.converged_)
+        return self
+
+    # callbacks plus, with verbose=True, the progress printout, wrapped in one CallbackList
+    # made fresh for every fit and never stored on the model, so a trained model still pickles without them
+    def _make_hooks(self, callbacks):
+        callbacks = list(callbacks or [])
+        if self.verbose:
+            callbacks.append(ProgressPrinter())
+        return CallbackList(callbacks)
+
+    # fresh starting point: all weights 0, no updates done yet
+    def _init_parameters(self, n_features):
+        self.weights = np.zeros(n_features, dtype=self.dtype)
+        self.bias = self.dtype.type(0)
+        self.cost_history = []
+        self._init_training_state(n_features)
+
+    # everything gradient descent keeps besides the weights: schedule counter, shuffling, optimizer, early stopping
+    # split out so partial_fit can start it for weights that came from somewhere else (a direct solve or update)
+    def _init_training_state(self, n_features):
+        self._t = 0
+        self._rng = np.random.default_rng(self.random_state)
+        self._rls = None
+        self._fit_information = None
+        # "auto" is filled in by _resolve_learning_rate once the data is known
+        self.learning_rate_ = None if self.learning_rate == "auto" else self.learning_rate
+        # one slot per weight plus one for the bias
+        self._optimizer = make_optimizer(self.optimizer, self.learning_rate_)
+        if self.batch_size is not None and self._optimizer.needs_full_batch:
+            raise ValueError(f"optimizer {self.optimizer!r} needs the full dataset, it can't be used with batch_size")
+        self._optimizer.reset(n_features + 1)
+        self.n_iter_ = 0
+        self.converged_ = False
+        self._best_cost = np.inf
+        self._n_stalled = 0
+
+    # learning_rate="auto": measure how sharply the bowl curves and take the 1/L step
+    def _resolve_learning_rate(self, objective):
+        if self.learning_rate != "auto":
+            return
+        n_params = len(self.weights) + 1
+        largest, smallest = hessian_spectrum(objective, n_params)
+        self.lipschitz_ = largest
+        # smallest <= 0 means some direction is completely flat (duplicate or constant columns)
+        self.condition_number_ = largest / smallest if smallest > 0 else np.inf
+        self.learning_rate_ = 1.0 / largest
+        self._optimizer.learning_rate = self.learning_rate_
+
+    # train on one chunk of data at a time (for data that shows up in pieces)
+    # the first call sets the normalization stats from its chunk, later calls reuse them
+    # (changing the mean/std halfway would change what the weights mean)
+    # each call does one epoch over the chunk and keeps weights, bias and the schedule going
+    # callbacks: see callbacks.py, each call is reported as a fit of one epoch
+    def partial_fit(self, X_chunk, y_chunk, callbacks=None):
+        X_chunk = np.asarray(X_chunk, dtype=self.dtype)
+        y_chunk = np.asarray(y_chunk, dtype=self.dtype)
+
+        first_call = self.weights is None
+        X_normalized = self._normalize_features(X_chunk, fit=first_call)
+        if first_call:
+            self.solver_ = "gd"
+            self._init_parameters(X_normalized.shape[1])
+            self._resolve_learning_rate(_DataObjective(X_normalized, y_chunk))
+        elif self._rng is None or getattr(self, '_optimizer', None) is None:
+            # weights from a direct solver or update(): keep them (and their mean / std),
+            # but the mini-batch state was never set up, so start it now
+            self.solver_ = "gd"
+            self._init_training_state(len(self.weights))
+            self._resolve_learning_rate(_DataObjective(X_normalized, y_chunk))
+
+        # the weights are about to move away from any earlier fit, so update() can't continue from it
+        self._fit_information = None
+
+        hooks = CallbackList(callbacks)
+        hooks.fit_begin(self, len(y_chunk), X_normalized.shape[1], 1, "gd")
+        cost = self._run_epoch(X_normalized, y_chunk)
+        self.cost_history.append(cost)
+        hooks.iteration_end(self, 1, cost, unit="epoch")
+        hooks.fit_end(self, 1, False)
+        return self
+
+    # online training with recursive least squares: fold new rows into the exact least squares answer
+    # for all rows passed to update so far, in O(d^2) per row, without touching the old rows or looping
+    # X_new can be one row or a small batch
+    # forgetting: 1.0 treats every row the same, 0.999 lets each older row count 0.999x as much per newer row
+    # after fit() with a direct solver or gradient_mode="gram" the first call continues from the fitted weights,
+    # with P from the A^T A that fit kept (gram mode weights are taken as they are, not re-solved)
+    # a fresh model starts from scratch
+    # weights from other gd modes / fit_chunks / partial_fit / load have no A^T A to continue from,
+    # so update refuses them
+    # fit / fit_chunks / partial_fit start over and drop the update state
+    # the mean / std keep following every row seen (RunningMoments, not affected by forgetting)
+    # when they move, the state is re-expressed in the new normalization, so predict always matches the stats
+    def update(self, X_new, y_new, forgetting=1.0):
+        if not 0 < forgetting <= 1:
+            raise ValueError(f"forgetting must be in (0, 1], got {forgetting}")
+        # the solve is done in float64 whatever the model's dtype
+        X_new = np.atleast_2d(np.asarray(X_new, dtype=np.float64))
+        y_new = np.atleast_1d(np.asarray(y_new, dtype=np.float64))
+        if len(X_new) != len(y_new):
+            raise ValueError(f"X_new has {len(X_new)} rows but y_new has {len(y_new)}")
+        if len(y_new) == 0:
+            return self
+
+        if self._rls is None:
+            self._rls_moments = RunningMoments()
+            if self.weights is None:
+                self._rls = _RecursiveLeastSquares(X_new.shape[1] + 1)
+                old_mean = old_std = None
+            elif self._fit_information is None:
+                raise ValueError("update() can only continue from a fit() with a direct solver or "
+                                 "gradient_mode='gram'; these weights have no X^T X to continue from, "
+                                 "refit that way or start from a new model")
+            else:
+                # the fit's rows count as already seen: its mean / variance and row count seed the running moments
+                # diag(A^T A) = sum of z^2 = n * variance / std^2, which is 0 for constant columns (their std
+                # was replaced by 1), so std^2 * diag(A^T A) is exactly the rows' real sum of squared distances
+                old_mean = self._mean.astype(np.float64)
+                old_std = self._std.astype(np.float64)
+                self._rls = _RecursiveLeastSquares.from_fit(np.append(self.weights, self.bias), self._fit_information)
+                self._rls_moments.count = self._rls.n_updates
+                self._rls_moments.mean = old_mean.copy()
+                self._rls_moments.m2 = old_std ** 2 * np.diag(self._fit_information)[:-1]
+            self.cost_history = []
+            self.solver_ = "rls"
+        else:
+            old_mean, old_std = self._rls_moments.mean, self._rls_std
+
+        self._rls_moments.update(X_new)
+        mean = self._rls_moments.mean
+        std = self._rls_moments.std
+        std[std == 0] = 1
+        if old_mean is not None:
+            self._rls.change_normalization(std / old_std, (mean - old_mean) / old_std)
+        self._rls_std = std
+
+        # normalized rows with a 1 on the end for the bias
+        A = np.empty((len(X_new), X_new.shape[1] + 1))
+        np.subtract(X_new, mean, out=A[:, :-1])
+        A[:, :-1] /= std
+        A[:, -1] = 1.0
+        self._rls.update(A, y_new, forgetting)
+
+        self._set_moments(mean, std)
+        self.weights = self._rls.theta[:-1].astype(self.dtype)
+        self.bias = self.dtype.type(self._rls.theta[-1])
+        return self
+
+    # out-of-core training: the data comes as chunks of (X_chunk, y_chunk) instead of one big array
+    # chunks is a list of chunks or a function returning a fresh iterator each time
+    # (see streaming.npy_chunks / streaming.array_chunks)
+    # pass 1 streams through once to get the mean / std (RunningMoments, no full copy)
+    # after that every chunk is normalized on the fly right before it is used, then thrown away
+    # callbacks: see callbacks.py
+    def fit_chunks(self, chunks, callbacks=None):
+        if self.solver != "gd" or self.gradient_mode != "data":
+            raise ValueError("fit_chunks only works with solver='gd' and gradient_mode='data'")
+
+        moments = RunningMoments()
+        for X_chunk, _ in iter_chunks(chunks):
+            moments.update(X_chunk)
+        if moments.count == 0:
+            raise ValueError("chunks did not produce any rows")
+        std = moments.std
+        std[std == 0] = 1
+        self._set_moments(moments.mean, std)
+
+        self.solver_ = "gd"
+        self._init_parameters(len(self._mean))
+
+        objective = _ChunkedObjective(self, chunks)
+        self._resolve_learning_rate(objective)
+
+        hooks = self._make_hooks(callbacks)
+        hooks.fit_begin(self, moments.count, len(self._mean), self.n_iterations, "gd")
+        # full batch: every step adds up each chunk's share of the gradient
+        if self.batch_size is None:
+            return self._run_full_batch(objective, hooks)
+
+        # mini-batch: take small steps inside every chunk, just like partial_fit
+        for i in range(self.n_iterations):
+            total_cost, n_rows = 0.0, 0
+            # the chunks come normalized in the objective's reused buffers
+            for part in objective._chunk_objectives():
+                total_cost += self._run_epoch(part.X, part.y, part) * part.m
+                n_rows += part.m
+            cost = total_cost / n_rows
+            self.cost_history.append(cost)
+            self.n_iter_ = i + 1
+            hooks.iteration_end(self, i + 1, cost, unit="epoch")
+            if self.stop_on == "cost" and self._check_convergence(cost, None):
+                break
+
+        hooks.fit_end(self, self.n_iter_, self.converged_)
+        return self
+
     #training loop - where learning takes place by implementing gradients, costs, and normalized data
-    def fit(self, X, y):
+    # callbacks: a list of callbacks.Callback objects that get told about the fit as it runs
+        # (timing, samples/sec, gradient norm, cost, see callbacks.py), nothing is printed unless verbose=True
+    def fit(self, X, y, callbacks=None):
         # convert the input data into arrays so that we can do matrix multiplication which deosnt work on normal python lists
         #store the x and y data
+        # asarray + dtype: converted to the model's dtype, and not copied at all when it already is
         #X are the input features
-        X = np.array(X)
+        X = np.asarray(X, dtype=self.dtype)
         #y are the target values
-        y = np.array(y)
+        y = np.asarray(y, dtype=self.dtype)
         
         # create the normalized features by running the previous normalize function
         # fit = True means its training data
-        X_normalized = self._normalize_features(X, fit=True)
+        # parallel mode only needs the stats here: it normalizes X straight into the workers' shared memory,
+        # so there is never a private normalized copy next to the shared one
+        if self.solver == "gd" and self.gradient_mode == "parallel":
+            self._fit_moments(X)
+            X_normalized = None
+        else:
+            X_normalized = self._normalize_features(X, fit=True)
+        hooks = self._make_hooks(callbacks)
         
+        # direct solvers skip the loop entirely and land on the exact answer
+        if self.solver != "gd":
+            self._rls = None
+            # drop any earlier gd run's schedule, shuffling and optimizer momentum, so a later partial_fit
+            # starts them fresh from these weights
+            self._t = 0
+            self._rng = None
+            self._optimizer = None
+            self.n_iter_ = 1
+            self.converged_ = False
+            hooks.fit_begin(self, len(y), X_normalized.shape[1], 1, self.solver)
+            gram = self._solve_direct(X_normalized, y)
+            self._fit_information = self._compute_fit_information(len(y), gram / len(y),
+                                                                  np.mean(X_normalized, axis=0, dtype=np.float64))
+            # only one "step" was taken, so the history is just the final cost
+            self.cost_history = [self._compute_cost(X_normalized, y, self.weights, self.bias)]
+            hooks.iteration_end(self, 1, self.cost_history[0])
+            hooks.fit_end(self, 1, False)
+            return self
+
+        self.solver_ = "gd"
         #get the number of features (columns) by specifying [1]
-        n_features = X_normalized.shape[1]
+        n_features = X.shape[1]
         #create an array for self.weights and fill it with 0's, the size is determined by the number of features
-        self.weights = np.zeros(n_features)
         #set intercept to 0
-        self.bias = 0
-        #this is an empty list that will be used to store the error rate eventually
-        self.cost_history = []
-        
-        #loop that runs an "iterations" number of times
-        # each iteration is 1 step of learning
-        for i in range(self.n_iterations):
+        #and empty the list that will be used to store the error rate eventually
+        self._init_parameters(n_features)
+        # gram mode's summaries are all update() needs to pick up where this fit leaves off
+        # the other modes never build X^T X, and an extra O(n * d^2) pass just in case isn't worth it,
+        # so their weights can't be continued by update()
 
-            # inside the learning loop the direction to move has to be figured out
-            # pass in current weights and bias to the _compute_gradients function
-            # dw = a vector of gradients (slopes) for weights, calculated by multiplying features by errors
-            # db = gradient (scalar slope) for bias
+        # parallel mode: the workers hold the shards for the whole loop and are stopped right after it
+        if self.gradient_mode == "parallel":
+            with ShardedObjective(X, y, self.n_jobs, self.blas_threads, self._mean, self._std) as objective:
+                self._resolve_learning_rate(objective)
+                hooks.fit_begin(self, len(y), n_features, self.n_iterations, "gd")
+                return self._run_full_batch(objective, hooks)
 
-            #if dw is positive = then increasing the weight increases error, so the weight should be decreased
-            # example of tuple unpacking
-                # first return of function goes to dw, second return goes to db
-            dw, db = self._compute_gradients(X_normalized, y, self.weights, self.bias)
-            
-            # updating step
-            # subtracting the gradient means going down hill which is minimizing error
-            # self.weights is a vector ex: [0, 0, 0]
-            # dw is a vector ex: [5, -2, 1]
-            # learning rate is a scalar ex: [0.01]
-            # operates on all features simulatenously by multiplying the whole vectors
+        # gram mode: one pass over the data now, then the loop only uses the small summaries
+        if self.gradient_mode == "gram":
+            stats = self._compute_gram_stats(X_normalized, y)
+            self._fit_information = self._compute_fit_information(len(y), stats['G'], stats['x_mean'])
+            objective = _GramObjective(stats)
+        else:
+            objective = _DataObjective(X_normalized, y)
+        self._resolve_learning_rate(objective)
+        hooks.fit_begin(self, len(y), n_features, self.n_iterations, "gd")
+
+        # mini-batch mode: each "iteration" is a full epoch of small steps
+        if self.batch_size is not None:
+            for epoch in range(self.n_iterations):
+                cost = self._run_epoch(X_normalized, y, objective)
+                self.cost_history.append(cost)
+                self.n_iter_ = epoch + 1
+                hooks.iteration_end(self, epoch + 1, cost, unit="epoch")
+                # mini-batches don't have one full gradient, so only the cost rule applies here
+                if self.stop_on == "cost" and self._check_convergence(cost, None):
+                    break
+            hooks.fit_end(self, self.n_iter_, self.converged_)
+            return self
 
-            self.weights = self.weights - self.learning_rate * dw
-            self.bias = self.bias - self.learning_rate * db
-            
-            # calculate MSE (cost) and save it
-            # MSE acts as a score for how well the model adjusted by the new weights
-            cost = self._compute_cost(X_normalized, y, self.weights, self.bias)
-            self.cost_history.append(cost)
-            
-            #every 100 loops/steps the model prints out its current cost to see if its getting smaller
-            if (i + 1) % 100 == 0:
-                print(f"Iteration {i + 1}/{self.n_iterations}, Cost: {cost:.6f}")
-        
         #self is the trained object
-        return self
-    
+        return self._run_full_batch(objective, hooks)
+
     # this is using the model AFTER training is done
     # setting fit to false because now we are TESTING not training
+    # X goes through in blocks of _PREDICT_BLOCK_ROWS rows, each normalized into the same buffer,
+    # so predicting never makes a normalized copy of the whole X (only the output is n-sized)
+    # a single 1-D row gives back a single number, like X . w + b always did
     def predict(self, X):
-        X = np.array(X)
-        X_normalized = self._normalize_features(X, fit=False)
-        # y = mx+b
-        # np.dot(X_normalized, self.weights) = mx
-        # self.bias = b
-        return np.dot(X_normalized, self.weights) + self.bias
+        X = np.asarray(X)
+        single_row = X.ndim == 1
+        X = np.atleast_2d(X)
+        n_samples = len(X)
+        predictions = np.empty(n_samples, dtype=self.weights.dtype)
+        block_rows = max(1, min(n_samples, _PREDICT_BLOCK_ROWS))
+        buffer = np.empty((block_rows, len(self.weights)), dtype=self.weights.dtype)
+
+        for start in range(0, n_samples, block_rows):
+            stop = min(start + block_rows, n_samples)
+            X_normalized = self._normalize_features(X[start:stop], out=buffer[:stop - start])
+            # y = mx+b
+            # np.dot(X_normalized, self.weights) = mx, written straight into this block of the output
+            # self.bias = b
+            block = predictions[start:stop]
+            np.dot(X_normalized, self.weights, out=block)
+            block += self.bias
+        return predictions[0] if single_row else predictions
     
 
+    # predictions for data too big for predict(), one array per chunk
+    # source: a .npy / .csv path, an array, or chunks (see batch_predict.py for the options)
+    def predict_iter(self, source, **options):
+        return predict_iter(self, source, **options)
+
+    # the same predictions as one X @ w + b, with the normalization folded into w and b (see model_io.py)
+    def to_scorer(self):
+        return LinearScorer.from_model(self)
+
+    # write the trained model to a small binary file (see model_io.py for the layout)
+    def save(self, path):
+        return save_model(self, path)
+
+    # read a model written by save()
+    @staticmethod
+    def load(path):
+        return load_model(path)
+
     # calculates R^2 the coefficient of determination
     # 
     def score(self, X, y):
@@ -219,6 +1106,125 @@ class LinearRegressionScratch:
         return 1 - (ss_res / ss_tot)
 
 
+# race the optimizers on the same data: how many iterations does each need to reach tol?
+# stops on the gradient norm so every optimizer is held to the same "flat enough" standard
+# returns one dict per optimizer, fastest first
+def compare_optimizers(X, y, optimizers=("gd", "momentum", "nesterov", "adam", "line_search", "lbfgs"),
+                       learning_rate=0.1, tol=1e-6, n_iterations=10000):
+    results = []
+    for optimizer in optimizers:
+        model = LinearRegressionScratch(learning_rate=learning_rate, n_iterations=n_iterations,
+                                        optimizer=optimizer, tol=tol, stop_on="gradient",
+                                        cost_every=n_iterations, verbose=False)
+        model.fit(X, y)
+        results.append({
+            'optimizer': optimizer if isinstance(optimizer, str) else type(optimizer).__name__,
+            'n_iter': model.n_iter_,
+            'converged': model.converged_,
+            'final_cost': model.cost_history[-1],
+        })
+    results.sort(key=lambda result: (not result['converged'], result['n_iter']))
+    return results
+
+
+# train many gradient descent configurations at once
+# every combination of learning_rates x alphas x n_iterations becomes one column of a d x K weight matrix W
+# one step for all K models is then X @ W (a matrix-matrix product) instead of K separate X @ w products
+# alpha is an L2 (ridge) penalty: cost = MSE/2 + (alpha/2) * |w|^2, the bias isn't penalized
+# a configuration stops updating once it has used its own n_iterations, or once its cost blows up (too big a step)
+# returns one dict per configuration with its weights, bias, cost_history and a ready-to-use model
+def sweep_gradient_descent(X, y, learning_rates, alphas=(0.0,), n_iterations=(1000,)):
+    X = np.array(X)
+    y = np.array(y)
+    if np.isscalar(n_iterations):
+        n_iterations = (n_iterations,)
+
+    # normalization is shared, it only depends on X
+    template = LinearRegressionScratch(verbose=False)
+    X_normalized = template._normalize_features(X, fit=True)
+    m, n_features = X_normalized.shape
+
+    configs = [(lr, alpha, iters) for lr in learning_rates for alpha in alphas for iters in n_iterations]
+    lr = np.array([config[0] for config in configs], dtype=float)
+    alpha = np.array([config[1] for config in configs], dtype=float)
+    budget = np.array([config[2] for config in configs])
+    n_configs = len(configs)
+    max_iterations = int(budget.max())
+
+    # a column of ones turns the bias into just another weight (the last row of theta)
+    # so X_aug @ theta gives predictions and X_aug.T @ errors gives every gradient, bias included
+    X_aug = np.empty((m, n_features + 1))
+    X_aug[:, :-1] = X_normalized
+    X_aug[:, -1] = 1.0
+    theta = np.zeros((n_features + 1, n_configs))
+    costs = np.full((max_iterations, n_configs), np.nan)
+    diverged = np.zeros(n_configs, dtype=bool)
+    # every configuration starts at theta = 0, where the cost is mean(y^2) / 2
+    start_cost = np.dot(y, y) / (2 * m)
+
+    # only the configurations still training are in the matrix product
+    # whenever one finishes (or blows up) the working set shrinks, so finished columns cost nothing
+    active = np.arange(n_configs)
+    # huge steps overflow to inf/nan, those columns get dropped instead of spamming warnings
+    with np.errstate(over='ignore', invalid='ignore'):
+        for i in range(max_iterations):
+            still_training = active[(i < budget[active]) & ~diverged[active]]
+            if len(still_training) == 0:
+                break
+            if i == 0 or len(still_training) != len(active):
+                # write the finished columns back, then rebuild the working set
+                if i > 0:
+                    theta[:, active] = theta_active
+                active = still_training
+                theta_active = theta[:, active]
+                step = lr[active]
+                alpha_active = alpha[active]
+                # the bias isn't penalized, so alpha only applies to the weight rows
+                penalty = np.zeros_like(theta_active)
+                penalty[:-1] = alpha_active
+                # same fused loop as fit: the errors of the new weights give this step's cost and the next step's gradient
+                # errors is one n x K buffer that gets overwritten in place every step
+                errors = np.empty((m, len(active)))
+                np.dot(X_aug, theta_active, out=errors)
+                errors -= y[:, None]
+
+            gradient = np.dot(X_aug.T, errors) / m + penalty * theta_active
+            theta_active -= step * gradient
+
+            np.dot(X_aug, theta_active, out=errors)
+            errors -= y[:, None]
+            # column-wise sum of squares without building errors ** 2
+            weights = theta_active[:-1]
+            cost = (np.einsum('ij,ij->j', errors, errors) / (2 * m)
+                    + 0.5 * alpha_active * np.einsum('ij,ij->j', weights, weights))
+            costs[i, active] = cost
+            # blown up to inf/nan, or still finite but climbing (a too-big step takes ~1e70 costs to overflow)
+            diverged[active] = ~np.isfinite(cost) | (cost > start_cost * _DIVERGENCE_FACTOR)
+        theta[:, active] = theta_active
+
+    results = []
+    for k, (learning_rate, config_alpha, iterations) in enumerate(configs):
+        history = costs[:iterations, k]
+        history = history[~np.isnan(history)]
+        model = LinearRegressionScratch(learning_rate=learning_rate, n_iterations=iterations, verbose=False)
+        model._mean, model._std = template._mean, template._std
+        model.weights, model.bias = theta[:-1, k].copy(), theta[-1, k]
+        model.cost_history = list(history)
+        model.n_iter_ = len(history)
+        model.solver_ = "gd"
+        results.append({
+            'learning_rate': learning_rate,
+            'alpha': config_alpha,
+            'n_iterations': iterations,
+            'weights': model.weights,
+            'bias': model.bias,
+            'cost_history': history,
+            'diverged': bool(diverged[k]),
+            'model': model,
+        })
+    return results
+
+
 def demonstrate_gradient_descent():
     print("\n=== Gradient Descent Demonstration ===")
     print("Finding minimum of f(x) = x² using gradient descent")
@@ -5,12 +5,12 @@ from sklearn.linear_model import LinearRegression
 # import pre-built normalization function (z = (x-mu)/stddev)
 from sklearn.preprocessing import StandardScaler
 
-# import functions like sum of squared errors, r^2
-from sklearn.metrics import mean_squared_error, r2_score
-
 # numpy library for arrays and matrix multiplication
 import numpy as np
 
+from callbacks import CallbackList
+from evaluation import evaluate_split, print_results
+
 
 class LinearRegressionSklearn:
     
@@ -21,9 +21,13 @@ class LinearRegressionSklearn:
         self.scaler = StandardScaler()
         
 
-    def fit(self, X, y):
+    # callbacks: the same callbacks.Callback objects LinearRegressionScratch.fit takes
+        # sklearn solves in one go, so the whole fit is reported as a single iteration
+    def fit(self, X, y, callbacks=None):
         X = np.array(X)
         y = np.array(y)
+        hooks = CallbackList(callbacks)
+        hooks.fit_begin(self, X.shape[0], X.shape[1], 1, "sklearn")
         
         # calculate and save the mean/std from this data
         # transform - apply the math to this data
@@ -31,6 +35,11 @@ class LinearRegressionSklearn:
         
         #
         self.model.fit(X_scaled, y)
+
+        if hooks.callbacks:
+            cost = np.mean((self.model.predict(X_scaled) - y) ** 2) / 2
+            hooks.iteration_end(self, 1, cost)
+        hooks.fit_end(self, 1, False)
         
         return self
     
@@ -48,25 +57,18 @@ class LinearRegressionSklearn:
         return self.model.coef_, self.model.intercept_
 
 
-def evaluate_model(model, X_train, X_test, y_train, y_test, model_name="Model"):
-    train_pred = model.predict(X_train)
-    test_pred = model.predict(X_test)
-    
-    train_mse = mean_squared_error(y_train, train_pred)
-    test_mse = mean_squared_error(y_test, test_pred)
-    train_r2 = r2_score(y_train, train_pred)
-    test_r2 = r2_score(y_test, test_pred)
+# verbose=False skips the printout and just returns the numbers (used by cross_validation.py)
+# the metrics come from evaluation.py in one pass over each split (no extra sklearn.metrics passes)
+def evaluate_model(model, X_train, X_test, y_train, y_test, model_name="Model", verbose=True):
+    results = evaluate_split({model_name: model}, X_train, X_test, y_train, y_test,
+                             return_predictions=False)[model_name]
     
-    print(f"\n{model_name} Results:")
-    print("-" * 40)
-    print(f"Training MSE: {train_mse:.4f}")
-    print(f"Testing MSE:  {test_mse:.4f}")
-    print(f"Training R²:  {train_r2:.4f}")
-    print(f"Testing R²:   {test_r2:.4f}")
+    if verbose:
+        print_results(model_name, {key: results[key] for key in ('train_mse', 'test_mse', 'train_r2', 'test_r2')})
     
     return {
-        'train_mse': train_mse,
-        'test_mse': test_mse,
-        'train_r2': train_r2,
-        'test_r2': test_r2
+        'train_mse': results['train_mse'],
+        'test_mse': results['test_mse'],
+        'train_r2': results['train_r2'],
+        'test_r2': results['test_r2']
     }
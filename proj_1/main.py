@@ -1,39 +1,41 @@
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import ssl
-import certifi
-from sklearn.datasets import fetch_california_housing
-from sklearn.model_selection import train_test_split
+# command line entry point for the house price experiment
+# every stage only imports what it needs: matplotlib only for plots, pandas only for the statistics table,
+# and scikit-learn (slow to import) only for splitting, the sklearn model and the metrics
+import argparse
+import os
+import pickle
 
+from batch_predict import batch_predict, predict_iter
+from data_loader import load_california_housing
 from linear_regression_scratch import LinearRegressionScratch
-from linear_regression_sklearn import LinearRegressionSklearn, evaluate_model
+from model_io import load_scorer, save_model
+from profiling import Profiler, stage
 
-# Fix SSL certificate verification issue on macOS
-# Configure SSL to use certifi's certificate bundle for HTTPS connections
-def create_ssl_context():
-    return ssl.create_default_context(cafile=certifi.where())
+# where "train" saves the fitted models for the other subcommands
+DEFAULT_MODEL_DIR = "models"
+MODEL_FILES = {
+    'scratch': "scratch_model.pkl",
+    'sklearn': "sklearn_model.pkl",
+}
+# the same models in model_io's binary format, normalization folded in, used by "predict"
+SCORER_FILES = {
+    'scratch': "scratch_model.linreg",
+    'sklearn': "sklearn_model.linreg",
+}
 
-#ssl._create_default_https_context is a python internal variable
-# called whenever python executes an attept to make an https connection
-# this line means that whenever an SSL context is used for https, use the one I created manually
-# "Every time Python tries to connect to an HTTPS website, use the certificates from the certifi package to verify it."
-ssl._create_default_https_context = create_ssl_context
 
-
-def load_and_explore_data():
+# explore=False skips the statistics table (which is what pulls in pandas)
+def load_and_explore_data(explore=True):
     print("=" * 60)
     print("LOADING CALIFORNIA HOUSING DATASET")
     print("=" * 60)
     
-    housing = fetch_california_housing()
-    X = housing.data
-    y = housing.target
-    feature_names = housing.feature_names
-    
-    df = pd.DataFrame(X, columns=feature_names)
-    df['Target'] = y
+    # local memory-mapped cache, only downloads the first time (see data_loader.py)
+    with stage("load"):
+        dataset = load_california_housing()
+    X = dataset.X
+    y = dataset.y
+    feature_names = dataset.feature_names
     
     print("\nDataset Shape:")
     print(f"  Samples: {X.shape[0]}")
@@ -43,197 +45,143 @@ def load_and_explore_data():
     for i, name in enumerate(feature_names):
         print(f"  {i + 1}. {name}")
     
-    print("\nDataset Statistics:")
-    print(df.describe().round(2))
+    if explore:
+        with stage("explore"):
+            print("\nDataset Statistics:")
+            print(dataset.describe().round(2))
     
     print("\nTarget Variable (Median House Value in $100,000s):")
     print(f"  Min: ${y.min() * 100000:,.0f}")
     print(f"  Max: ${y.max() * 100000:,.0f}")
     print(f"  Mean: ${y.mean() * 100000:,.0f}")
     
-    return X, y, feature_names, df
+    return X, y, feature_names, dataset
+
 
+# the figures are drawn by plotting.py, these only gather the small arrays each one needs
+# and hand them to the renderer (which may draw them in a background process, see plotting.Renderer)
+def visualize_data(renderer, X, y, feature_names):
+    import plotting
 
-def visualize_data(df, feature_names):
     print("\n" + "=" * 60)
     print("CREATING DATA VISUALIZATIONS")
     print("=" * 60)
-    
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-    
-    ax1 = axes[0, 0]
-    ax1.hist(df['Target'], bins=50, edgecolor='black', alpha=0.7, color='steelblue')
-    ax1.set_xlabel('Median House Value ($100,000s)')
-    ax1.set_ylabel('Frequency')
-    ax1.set_title('Distribution of House Prices')
-    ax1.axvline(df['Target'].mean(), color='red', linestyle='--', label=f"Mean: {df['Target'].mean():.2f}")
-    ax1.legend()
-    
-    ax2 = axes[0, 1]
-    correlations = df.corr()['Target'].drop('Target').sort_values()
-    colors = ['green' if c > 0 else 'red' for c in correlations]
-    correlations.plot(kind='barh', ax=ax2, color=colors)
-    ax2.set_xlabel('Correlation with House Price')
-    ax2.set_title('Feature Correlations with Target')
-    ax2.axvline(0, color='black', linestyle='-', linewidth=0.5)
-    
-    ax3 = axes[1, 0]
-    sample_idx = np.random.choice(len(df), size=min(2000, len(df)), replace=False)
-    ax3.scatter(df['MedInc'].iloc[sample_idx], df['Target'].iloc[sample_idx], 
-                alpha=0.3, s=10, color='steelblue')
-    ax3.set_xlabel('Median Income')
-    ax3.set_ylabel('Median House Value ($100,000s)')
-    ax3.set_title('Income vs House Price')
-    
-    ax4 = axes[1, 1]
-    scatter = ax4.scatter(df['Longitude'].iloc[sample_idx], 
-                          df['Latitude'].iloc[sample_idx],
-                          c=df['Target'].iloc[sample_idx], 
-                          cmap='viridis', alpha=0.5, s=10)
-    ax4.set_xlabel('Longitude')
-    ax4.set_ylabel('Latitude')
-    ax4.set_title('Geographic Distribution of House Prices')
-    plt.colorbar(scatter, ax=ax4, label='Price ($100,000s)')
-    
-    plt.tight_layout()
-    plt.savefig('data_exploration.png', dpi=150, bbox_inches='tight')
-    print("  Saved: data_exploration.png")
-    plt.close()
+    with stage("visualize"):
+        renderer.submit(plotting.render_data_exploration,
+                        plotting.data_exploration_payload(X, y, feature_names, style=renderer.style),
+                        'data_exploration.png')
 
 
-def visualize_training(scratch_model, sklearn_results, scratch_results):
+def visualize_training(renderer, scratch_model, sklearn_results, scratch_results):
+    import plotting
+
     print("\n" + "=" * 60)
     print("CREATING TRAINING VISUALIZATIONS")
     print("=" * 60)
-    
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-    
-    ax1 = axes[0]
-    ax1.plot(scratch_model.cost_history, color='steelblue', linewidth=1.5)
-    ax1.set_xlabel('Iteration')
-    ax1.set_ylabel('Cost (MSE)')
-    ax1.set_title('Gradient Descent Convergence')
-    ax1.set_yscale('log')
-    ax1.grid(True, alpha=0.3)
-    
-    ax1.scatter([0], [scratch_model.cost_history[0]], color='red', s=100, 
-                zorder=5, label=f'Initial: {scratch_model.cost_history[0]:.4f}')
-    ax1.scatter([len(scratch_model.cost_history)-1], [scratch_model.cost_history[-1]], 
-                color='green', s=100, zorder=5, 
-                label=f'Final: {scratch_model.cost_history[-1]:.4f}')
-    ax1.legend()
-    
-    ax2 = axes[1]
-    models = ['From Scratch', 'Scikit-learn']
-    train_r2 = [scratch_results['train_r2'], sklearn_results['train_r2']]
-    test_r2 = [scratch_results['test_r2'], sklearn_results['test_r2']]
-    
-    x = np.arange(len(models))
-    width = 0.35
-    
-    bars1 = ax2.bar(x - width/2, train_r2, width, label='Train R²', color='steelblue')
-    bars2 = ax2.bar(x + width/2, test_r2, width, label='Test R²', color='coral')
-    
-    ax2.set_ylabel('R² Score')
-    ax2.set_title('Model Performance Comparison')
-    ax2.set_xticks(x)
-    ax2.set_xticklabels(models)
-    ax2.legend()
-    ax2.set_ylim(0, 1)
-    
-    for bar in bars1 + bars2:
-        height = bar.get_height()
-        ax2.annotate(f'{height:.3f}',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3),
-                    textcoords="offset points",
-                    ha='center', va='bottom', fontsize=10)
-    
-    plt.tight_layout()
-    plt.savefig('training_visualization.png', dpi=150, bbox_inches='tight')
-    print("  Saved: training_visualization.png")
-    plt.close()
+    renderer.submit(plotting.render_training,
+                    plotting.training_payload(scratch_model, sklearn_results, scratch_results),
+                    'training_visualization.png')
 
 
-def visualize_predictions(y_test, scratch_pred, sklearn_pred):
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-    
-    sample_size = min(500, len(y_test))
-    idx = np.random.choice(len(y_test), sample_size, replace=False)
-    
-    for ax, pred, title in [(axes[0], scratch_pred, 'From Scratch'),
-                            (axes[1], sklearn_pred, 'Scikit-learn')]:
-        ax.scatter(y_test[idx], pred[idx], alpha=0.5, s=20, color='steelblue')
-        
-        min_val = min(y_test.min(), pred.min())
-        max_val = max(y_test.max(), pred.max())
-        ax.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, 
-                label='Perfect Prediction')
-        
-        ax.set_xlabel('Actual Price ($100,000s)')
-        ax.set_ylabel('Predicted Price ($100,000s)')
-        ax.set_title(f'{title}: Actual vs Predicted')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig('predictions_comparison.png', dpi=150, bbox_inches='tight')
-    print("  Saved: predictions_comparison.png")
-    plt.close()
+def visualize_predictions(renderer, y_test, scratch_pred, sklearn_pred):
+    import plotting
 
+    renderer.submit(plotting.render_predictions,
+                    plotting.predictions_payload(y_test, scratch_pred, sklearn_pred, style=renderer.style),
+                    'predictions_comparison.png')
+
+
+def make_renderer(args):
+    import plotting
+
+    return plotting.Renderer(mode=args.render_mode, style=args.plot_style)
+
+
+def split_data(X, y):
+    from sklearn.model_selection import train_test_split
 
-def main():
-    print("\n" + "=" * 60)
-    print("HOUSE PRICE PREDICTOR")
-    print("Linear Regression: From Scratch vs Scikit-learn")
-    print("=" * 60)
-    
-    X, y, feature_names, df = load_and_explore_data()
-    
-    visualize_data(df, feature_names)
-    
     print("\n" + "=" * 60)
     print("SPLITTING DATA")
     print("=" * 60)
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    # fixed random_state so every subcommand sees the same train/test rows
+    with stage("split"):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
     print(f"  Training samples: {len(X_train)}")
     print(f"  Testing samples: {len(X_test)}")
-    
+    return X_train, X_test, y_train, y_test
+
+
+def train_models(X_train, y_train):
+    from linear_regression_sklearn import LinearRegressionSklearn
+
     print("\n" + "=" * 60)
     print("TRAINING: LINEAR REGRESSION FROM SCRATCH")
     print("=" * 60)
-    scratch_model = LinearRegressionScratch(learning_rate=0.1, n_iterations=1000)
-    scratch_model.fit(X_train, y_train)
+    with stage("train scratch"):
+        scratch_model = LinearRegressionScratch(learning_rate=0.1, n_iterations=1000, verbose=True)
+        scratch_model.fit(X_train, y_train)
     
     print("\n" + "=" * 60)
     print("TRAINING: SCIKIT-LEARN LINEAR REGRESSION")
     print("=" * 60)
-    sklearn_model = LinearRegressionSklearn()
-    sklearn_model.fit(X_train, y_train)
+    with stage("train sklearn"):
+        sklearn_model = LinearRegressionSklearn()
+        sklearn_model.fit(X_train, y_train)
     print("  Training complete (uses closed-form solution)")
-    
+    return scratch_model, sklearn_model
+
+
+# both models scored in one sweep (evaluation.py), the test predictions come back in the results for plotting
+def evaluate_models(scratch_model, sklearn_model, X_train, X_test, y_train, y_test):
+    from evaluation import evaluate_split, print_results
+
     print("\n" + "=" * 60)
     print("MODEL EVALUATION")
     print("=" * 60)
     
-    scratch_results = evaluate_model(
-        scratch_model, X_train, X_test, y_train, y_test, 
-        "Linear Regression (From Scratch)"
-    )
-    
-    sklearn_results = evaluate_model(
-        sklearn_model, X_train, X_test, y_train, y_test,
-        "Linear Regression (Scikit-learn)"
-    )
-    
-    scratch_pred = scratch_model.predict(X_test)
-    sklearn_pred = sklearn_model.predict(X_test)
-    
-    visualize_training(scratch_model, sklearn_results, scratch_results)
-    visualize_predictions(y_test, scratch_pred, sklearn_pred)
-    
+    names = {
+        'scratch': "Linear Regression (From Scratch)",
+        'sklearn': "Linear Regression (Scikit-learn)",
+    }
+    with stage("evaluate"):
+        results = evaluate_split({'scratch': scratch_model, 'sklearn': sklearn_model},
+                                 X_train, X_test, y_train, y_test)
+    for key, name in names.items():
+        print_results(name, results[key])
+    return results['scratch'], results['sklearn']
+
+
+def save_models(scratch_model, sklearn_model, model_dir):
+    os.makedirs(model_dir, exist_ok=True)
+    for key, model in (('scratch', scratch_model), ('sklearn', sklearn_model)):
+        path = os.path.join(model_dir, MODEL_FILES[key])
+        with open(path, "wb") as f:
+            pickle.dump(model, f)
+        print(f"  Saved: {path}")
+        print(f"  Saved: {save_model(model, os.path.join(model_dir, SCORER_FILES[key]))}")
+
+
+def load_model(model_dir, key):
+    path = os.path.join(model_dir, MODEL_FILES[key])
+    if not os.path.exists(path):
+        raise SystemExit(f"No trained model at {path}, run 'python main.py train' first")
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+# the test predictions were already made during evaluation
+def plot_results(renderer, scratch_model, scratch_results, sklearn_results, y_test):
+    scratch_pred = scratch_results['test_predictions']
+    sklearn_pred = sklearn_results['test_predictions']
+    
+    with stage("plot"):
+        visualize_training(renderer, scratch_model, sklearn_results, scratch_results)
+        visualize_predictions(renderer, y_test, scratch_pred, sklearn_pred)
+
+
+def print_summary(plots):
     print("\n" + "=" * 60)
     print("SUMMARY")
     print("=" * 60)
@@ -242,15 +190,157 @@ def main():
     print("  2. From-scratch uses gradient descent (iterative)")
     print("  3. Sklearn uses normal equation (closed-form)")
     print("  4. Feature normalization is crucial for gradient descent")
-    print("\nOutput Files Generated:")
-    print("  - data_exploration.png: Dataset visualizations")
-    print("  - training_visualization.png: Training process and comparison")
-    print("  - predictions_comparison.png: Actual vs predicted values")
+    if plots:
+        print("\nOutput Files Generated:")
+        print("  - data_exploration.png: Dataset visualizations")
+        print("  - training_visualization.png: Training process and comparison")
+        print("  - predictions_comparison.png: Actual vs predicted values")
+
+
+# the original end-to-end experiment: load, explore, train both models, evaluate, plot
+def run_pipeline(args):
+    print("\n" + "=" * 60)
+    print("HOUSE PRICE PREDICTOR")
+    print("Linear Regression: From Scratch vs Scikit-learn")
+    print("=" * 60)
+    
+    X, y, feature_names, dataset = load_and_explore_data(explore=not args.no_plots)
+    
+    # in background mode this figure is drawn while the models train
+    if not args.no_plots:
+        renderer = make_renderer(args)
+        visualize_data(renderer, X, y, feature_names)
+    
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    scratch_model, sklearn_model = train_models(X_train, y_train)
+    scratch_results, sklearn_results = evaluate_models(
+        scratch_model, sklearn_model, X_train, X_test, y_train, y_test)
+    
+    if not args.no_plots:
+        plot_results(renderer, scratch_model, scratch_results, sklearn_results, y_test)
+        # the only place the pipeline waits for the figures
+        with stage("wait for figures"):
+            renderer.wait()
+    
+    print_summary(plots=not args.no_plots)
     
     print("\n" + "=" * 60)
     print("EXPERIMENT COMPLETE")
     print("=" * 60)
 
 
+def run_train(args):
+    X, y, _, _ = load_and_explore_data(explore=False)
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    scratch_model, sklearn_model = train_models(X_train, y_train)
+    save_models(scratch_model, sklearn_model, args.model_dir)
+    print(f"\n  Test R² (From Scratch): {scratch_model.score(X_test, y_test):.4f}")
+    print(f"  Test R² (Scikit-learn): {sklearn_model.score(X_test, y_test):.4f}")
+
+
+def run_evaluate(args):
+    scratch_model = load_model(args.model_dir, 'scratch')
+    sklearn_model = load_model(args.model_dir, 'sklearn')
+    X, y, _, _ = load_and_explore_data(explore=False)
+    evaluate_models(scratch_model, sklearn_model, *split_data(X, y))
+
+
+def run_plot(args):
+    scratch_model = load_model(args.model_dir, 'scratch')
+    sklearn_model = load_model(args.model_dir, 'sklearn')
+    X, y, feature_names, _ = load_and_explore_data(explore=False)
+    renderer = make_renderer(args)
+    visualize_data(renderer, X, y, feature_names)
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    scratch_results, sklearn_results = evaluate_models(
+        scratch_model, sklearn_model, X_train, X_test, y_train, y_test)
+    plot_results(renderer, scratch_model, scratch_results, sklearn_results, y_test)
+    with stage("wait for figures"):
+        renderer.wait()
+
+
+# uses the binary scorer: memory-mapped weights and one X @ w + b, no scikit-learn import needed
+def run_predict(args):
+    path = os.path.join(args.model_dir, SCORER_FILES[args.model])
+    if not os.path.exists(path):
+        raise SystemExit(f"No trained model at {path}, run 'python main.py train' first")
+    scorer = load_scorer(path)
+    # chunk by chunk, so the input can be bigger than memory (see batch_predict.py)
+    if args.output:
+        n_rows = batch_predict(scorer, args.input, args.output, n_jobs=args.jobs)
+        print(f"  Saved {n_rows} predictions to {args.output}")
+    else:
+        for predictions in predict_iter(scorer, args.input, n_jobs=args.jobs):
+            for value in predictions:
+                print(f"{value:.6f}")
+
+
+# with --profile, every fit / predict / score call of the models shows up as its own stage
+# (predict only uses the binary scorer, so it skips the scikit-learn import this needs)
+def instrument_models(profiler, command):
+    methods = ("fit", "predict", "score")
+    profiler.instrument(LinearRegressionScratch, methods)
+    if command != 'predict':
+        with stage("import scikit-learn"):
+            from linear_regression_sklearn import LinearRegressionSklearn
+        profiler.instrument(LinearRegressionSklearn, methods)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="House price predictor: linear regression from scratch vs scikit-learn")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="skip the data exploration table and all PNG plots")
+    parser.add_argument("--render-mode", choices=["background", "serial"], default="background",
+                        help="draw the PNGs in background processes while training continues (default), "
+                             "or one after another in the main process")
+    parser.add_argument("--plot-style", choices=["scatter", "binned"], default="scatter",
+                        help="scatter a random sample of points (default), or bin every row into "
+                             "density grids so the plots show the full dataset at any size")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time every stage and model call, write a JSON summary to PATH "
+                             "and a Chrome trace next to it (PATH with .trace.json)")
+    parser.add_argument("--profile-no-memory", action="store_true",
+                        help="with --profile: skip tracemalloc (faster, but no per-stage peak memory)")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR,
+                        help=f"where trained models are saved / loaded (default: {DEFAULT_MODEL_DIR})")
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("train", help="train both models and save them to --model-dir")
+    subparsers.add_parser("evaluate", help="print train/test metrics for the saved models")
+    subparsers.add_parser("plot", help="render the three PNG reports from the saved models")
+    predict = subparsers.add_parser("predict", help="predict prices for a .npy or .csv file of features")
+    predict.add_argument("input", help="feature file: .npy, or .csv with a header row")
+    predict.add_argument("--model", choices=sorted(MODEL_FILES), default="scratch")
+    predict.add_argument("--output", help="write predictions to this file (.npy, or CSV text for anything else) "
+                                          "instead of printing them")
+    predict.add_argument("--jobs", type=int, default=None,
+                         help="processes parsing a CSV input in parallel (default: one per CPU core)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    commands = {
+        None: run_pipeline,
+        'train': run_train,
+        'evaluate': run_evaluate,
+        'plot': run_plot,
+        'predict': run_predict,
+    }
+    if not args.profile:
+        commands[args.command](args)
+        return
+
+    profiler = Profiler(trace_memory=not args.profile_no_memory)
+    with profiler:
+        instrument_models(profiler, args.command)
+        with stage(args.command or "pipeline"):
+            commands[args.command](args)
+    profiler.print_report()
+    trace_path = os.path.splitext(args.profile)[0] + ".trace.json"
+    print(f"\n  Saved: {profiler.save_json(args.profile)}")
+    print(f"  Saved: {profiler.save_chrome_trace(trace_path)}")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,142 @@
+#saving trained models to a small binary file, and a fast scorer for making predictions with them
+# both models predict the same way: normalize X with the training mean / std, then X.w + b
+# that normalization can be folded into the weights ahead of time:
+    # ((x - mean) / std) . w + b  =  x . (w / std) + (b - mean . (w / std))
+# so a trained model boils down to one weight vector and one number, and predicting is one X @ w + b
+# with no normalized copy of X at all (LinearScorer below)
+
+# the file layout (everything little endian):
+    # bytes 0-63: header = magic, format version, which model it came from, number type, number of features
+    # then one flat array of numbers: mean, std, weights, folded weights (each n_features long), bias, folded bias
+# the numbers start at byte 64, so the file can be memory-mapped and the weights read in place
+
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"LINREG\x00\x00"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+# magic, version, source ("scratch" / "sklearn"), dtype ("<f8" / "<f4"), n_features
+_HEADER = struct.Struct("<8sH8s4sQ")
+
+
+# ((x - mean) / std) . w + b  ->  x . w_folded + b_folded
+# done in float64 so folding doesn't add rounding error on top of the model's own
+def fold_normalization(mean, std, weights, bias):
+    weights_folded = np.asarray(weights, dtype=np.float64) / np.asarray(std, dtype=np.float64)
+    bias_folded = float(bias) - np.dot(np.asarray(mean, dtype=np.float64), weights_folded)
+    return weights_folded, bias_folded
+
+
+# the fitted numbers of either model: (source, mean, std, weights, bias)
+def _model_parameters(model):
+    # LinearRegressionSklearn keeps them inside its StandardScaler and LinearRegression
+    if hasattr(model, 'scaler'):
+        return ("sklearn", model.scaler.mean_, model.scaler.scale_,
+                model.model.coef_, model.model.intercept_)
+    if model.weights is None:
+        raise ValueError("the model has not been fitted yet")
+    return "scratch", model._mean, model._std, model.weights, model.bias
+
+
+# prediction is just X @ weights + bias (normalization already folded in)
+# works like the models for predict / score, so evaluate_model and the rest can use it directly
+class LinearScorer:
+
+    def __init__(self, weights, bias):
+        self.weights = weights
+        self.bias = bias
+
+    # fold a trained LinearRegressionScratch or LinearRegressionSklearn
+    # dtype: number type of the folded weights, defaults to the model's own
+    @classmethod
+    def from_model(cls, model, dtype=None):
+        _, mean, std, weights, bias = _model_parameters(model)
+        weights_folded, bias_folded = fold_normalization(mean, std, weights, bias)
+        dtype = np.dtype(dtype or np.asarray(weights).dtype)
+        return cls(weights_folded.astype(dtype), dtype.type(bias_folded))
+
+    def predict(self, X):
+        # np.dot makes the one output array, the bias is then added inside it
+        predictions = np.dot(np.asarray(X), self.weights)
+        predictions += self.bias
+        return predictions
+
+    # R^2, same formula as LinearRegressionScratch.score
+    def score(self, X, y):
+        y = np.asarray(y)
+        predictions = self.predict(X)
+        ss_res = np.sum((y - predictions) ** 2)
+        ss_tot = np.sum((y - np.mean(y)) ** 2)
+        return 1 - (ss_res / ss_tot)
+
+
+# write a trained model (either kind) to path
+def save_model(model, path):
+    source, mean, std, weights, bias = _model_parameters(model)
+    dtype = np.asarray(weights).dtype
+    weights_folded, bias_folded = fold_normalization(mean, std, weights, bias)
+    values = np.concatenate([mean, std, weights, weights_folded, [bias, bias_folded]]).astype(dtype.newbyteorder('<'))
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, source.encode(), dtype.newbyteorder('<').str.encode(), len(weights))
+    with open(path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\x00"))
+        f.write(values.tobytes())
+    return path
+
+
+# read the header and the numbers of a saved model
+# mmap=True maps the file instead of reading it, the arrays then point straight into the file
+def _read_model_file(path, mmap=True):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < _HEADER.size:
+        raise ValueError(f"{path} is too short to be a saved model")
+    magic, version, source, dtype, n_features = _HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a saved model (bad magic bytes)")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} uses model format version {version}, this code reads version {FORMAT_VERSION}")
+
+    dtype = np.dtype(dtype.rstrip(b"\x00").decode())
+    count = 4 * n_features + 2
+    if os.path.getsize(path) < HEADER_SIZE + count * dtype.itemsize:
+        raise ValueError(f"{path} is truncated: expected {count} numbers after the header")
+    if mmap:
+        values = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+    else:
+        values = np.fromfile(path, dtype=dtype, count=count, offset=HEADER_SIZE)
+
+    d = n_features
+    return {
+        'source': source.rstrip(b"\x00").decode(),
+        'mean': values[:d],
+        'std': values[d:2 * d],
+        'weights': values[2 * d:3 * d],
+        'weights_folded': values[3 * d:4 * d],
+        'bias': values[4 * d],
+        'bias_folded': values[4 * d + 1],
+    }
+
+
+# a LinearScorer straight from a saved file (from either model), no training code or scikit-learn needed
+def load_scorer(path, mmap=True):
+    saved = _read_model_file(path, mmap=mmap)
+    return LinearScorer(saved['weights_folded'], saved['bias_folded'])
+
+
+# a saved LinearRegressionScratch back as a LinearRegressionScratch (weights, bias, mean and std)
+# the cost history and training settings aren't saved, only what predict needs
+def load_model(path):
+    from linear_regression_scratch import LinearRegressionScratch
+
+    saved = _read_model_file(path, mmap=False)
+    if saved['source'] != "scratch":
+        raise ValueError(f"{path} holds a {saved['source']} model, use load_scorer() for it")
+    model = LinearRegressionScratch(dtype=saved['weights'].dtype, verbose=False)
+    model.weights = saved['weights'].copy()
+    model.bias = saved['bias']
+    model._set_moments(saved['mean'], saved['std'])
+    return model
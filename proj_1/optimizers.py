@@ -0,0 +1,235 @@
+#update rules for gradient descent
+# plain gradient descent always steps straight downhill by learning_rate * gradient
+# on a long narrow valley (badly scaled features) that zig-zags and needs tons of steps
+# these optimizers pick smarter steps using what they've seen so far
+
+# every optimizer works on one flat vector of parameters: theta = [w1, w2, ..., wd, bias]
+# and an "objective" that knows how to score theta (see _DataObjective in linear_regression_scratch.py):
+    # objective.cost(theta) -> the MSE cost
+    # objective.cost_and_gradient(theta) -> (cost, gradient)
+    # objective.curvature(direction) -> direction^T H direction (how sharply the bowl bends that way)
+        # only needed for the exact line search. for MSE the bowl is a perfect quadratic, so this is cheap
+
+import numpy as np
+
+
+class Optimizer:
+    # True for optimizers that need the real cost of the whole dataset (line searches)
+    # those can't be used with noisy mini-batches
+    needs_full_batch = False
+
+    def __init__(self, learning_rate=0.01):
+        self.learning_rate = learning_rate
+        # number of steps taken since the last reset
+        self.n_steps_ = 0
+
+    # forget everything from the last training run
+    def reset(self, n_params):
+        self.n_steps_ = 0
+
+    # take one step from theta, given the cost and gradient there
+    # returns the new theta
+    def step(self, theta, cost, grad, objective=None):
+        raise NotImplementedError
+
+
+# the original rule: theta = theta - learning_rate * gradient
+class GradientDescent(Optimizer):
+
+    def step(self, theta, cost, grad, objective=None):
+        self.n_steps_ += 1
+        return theta - self.learning_rate * grad
+
+
+# heavy ball: keep a running velocity, like a ball rolling downhill that builds up speed
+# directions that keep agreeing (along the valley) speed up, zig-zags across the valley cancel out
+class Momentum(Optimizer):
+
+    def __init__(self, learning_rate=0.01, momentum=0.9):
+        super().__init__(learning_rate)
+        self.momentum = momentum
+        self._velocity = None
+
+    def reset(self, n_params):
+        super().reset(n_params)
+        self._velocity = np.zeros(n_params)
+
+    def step(self, theta, cost, grad, objective=None):
+        self.n_steps_ += 1
+        self._velocity = self.momentum * self._velocity - self.learning_rate * grad
+        return theta + self._velocity
+
+
+# Nesterov momentum: "look ahead" to where the velocity is carrying us before correcting
+# written in the form that only needs the gradient at the current theta (no extra gradient call):
+    # theta_new = theta + momentum^2 * v - (1 + momentum) * learning_rate * grad
+    # v = momentum * v - learning_rate * grad
+class Nesterov(Momentum):
+
+    def step(self, theta, cost, grad, objective=None):
+        self.n_steps_ += 1
+        new_theta = (theta + self.momentum ** 2 * self._velocity
+                     - (1 + self.momentum) * self.learning_rate * grad)
+        self._velocity = self.momentum * self._velocity - self.learning_rate * grad
+        return new_theta
+
+
+# Adam: momentum on the gradient (m) plus a per-parameter step size from the gradient's size (v)
+# parameters with big gradients take smaller steps, parameters with tiny gradients take bigger ones
+class Adam(Optimizer):
+
+    def __init__(self, learning_rate=0.01, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        super().__init__(learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self._m = None
+        self._v = None
+
+    def reset(self, n_params):
+        super().reset(n_params)
+        self._m = np.zeros(n_params)
+        self._v = np.zeros(n_params)
+
+    def step(self, theta, cost, grad, objective=None):
+        self.n_steps_ += 1
+        t = self.n_steps_
+        self._m = self.beta1 * self._m + (1 - self.beta1) * grad
+        self._v = self.beta2 * self._v + (1 - self.beta2) * grad ** 2
+        # m and v start at 0, so early on they are too small. dividing fixes that bias
+        m_hat = self._m / (1 - self.beta1 ** t)
+        v_hat = self._v / (1 - self.beta2 ** t)
+        return theta - self.learning_rate * m_hat / (np.sqrt(v_hat) + self.epsilon)
+
+
+# the best step size along a direction for a quadratic bowl, no guessing:
+    # cost(theta + a*d) is a parabola in a, its bottom is at a = -(grad . d) / (d^T H d)
+def exact_step_size(objective, grad, direction):
+    curvature = objective.curvature(direction)
+    if curvature <= 0:
+        return 0.0
+    return -np.dot(grad, direction) / curvature
+
+
+# backtracking (Armijo) line search: start with a big step and halve it until the cost drops enough
+# works for any cost, only needs cost evaluations
+def backtracking_step_size(objective, theta, cost, grad, direction,
+                           initial=1.0, shrink=0.5, c=1e-4, max_halvings=50):
+    slope = np.dot(grad, direction)
+    step_size = initial
+    for _ in range(max_halvings):
+        if objective.cost(theta + step_size * direction) <= cost + c * step_size * slope:
+            return step_size
+        step_size *= shrink
+    return step_size
+
+
+def _line_search(method, objective, theta, cost, grad, direction):
+    if method == "exact":
+        return exact_step_size(objective, grad, direction)
+    return backtracking_step_size(objective, theta, cost, grad, direction)
+
+
+# steepest descent where every step length comes from a line search instead of learning_rate
+# method="exact" uses the quadratic formula above, method="backtracking" only uses costs
+class LineSearch(Optimizer):
+    needs_full_batch = True
+
+    def __init__(self, learning_rate=None, method="exact"):
+        super().__init__(learning_rate)
+        if method not in ("exact", "backtracking"):
+            raise ValueError(f"method must be 'exact' or 'backtracking', got {method!r}")
+        self.method = method
+
+    def step(self, theta, cost, grad, objective=None):
+        self.n_steps_ += 1
+        direction = -grad
+        return theta + _line_search(self.method, objective, theta, cost, grad, direction) * direction
+
+
+# L-BFGS: builds a cheap picture of the bowl's shape (the inverse Hessian)
+# from the last few (step taken, change in gradient) pairs, then steps toward where the bottom should be
+# on a quadratic it behaves a lot like conjugate gradient, so d+1 steps can be enough
+class LBFGS(Optimizer):
+    needs_full_batch = True
+
+    def __init__(self, learning_rate=None, memory=10, line_search="exact"):
+        super().__init__(learning_rate)
+        if line_search not in ("exact", "backtracking"):
+            raise ValueError(f"line_search must be 'exact' or 'backtracking', got {line_search!r}")
+        self.memory = memory
+        self.line_search = line_search
+        self._s = []
+        self._y = []
+        self._prev_theta = None
+        self._prev_grad = None
+
+    def reset(self, n_params):
+        super().reset(n_params)
+        self._s = []
+        self._y = []
+        self._prev_theta = None
+        self._prev_grad = None
+
+    # two-loop recursion: multiplies grad by the approximate inverse Hessian using only the stored pairs
+    def _direction(self, grad):
+        q = grad.copy()
+        alphas = []
+        for s, y in zip(reversed(self._s), reversed(self._y)):
+            rho = 1.0 / np.dot(y, s)
+            alpha = rho * np.dot(s, q)
+            q -= alpha * y
+            alphas.append((rho, alpha))
+
+        # starting guess for the inverse Hessian: a scaled identity from the newest pair
+        if self._s:
+            q *= np.dot(self._s[-1], self._y[-1]) / np.dot(self._y[-1], self._y[-1])
+
+        for (s, y), (rho, alpha) in zip(zip(self._s, self._y), reversed(alphas)):
+            beta = rho * np.dot(y, q)
+            q += s * (alpha - beta)
+        return -q
+
+    def step(self, theta, cost, grad, objective=None):
+        self.n_steps_ += 1
+        # remember how the gradient changed over the last step
+        if self._prev_theta is not None:
+            s = theta - self._prev_theta
+            y = grad - self._prev_grad
+            # only keep pairs that curve upward (always true for MSE, unless the step was ~0)
+            if np.dot(s, y) > 1e-12 * np.dot(y, y):
+                self._s.append(s)
+                self._y.append(y)
+                if len(self._s) > self.memory:
+                    self._s.pop(0)
+                    self._y.pop(0)
+
+        direction = self._direction(grad)
+        # if the picture is bad and the direction points uphill, start over from plain steepest descent
+        if np.dot(direction, grad) >= 0:
+            self._s, self._y = [], []
+            direction = -grad
+
+        step_size = _line_search(self.line_search, objective, theta, cost, grad, direction)
+        self._prev_theta = theta
+        self._prev_grad = grad
+        return theta + step_size * direction
+
+
+OPTIMIZERS = {
+    "gd": GradientDescent,
+    "momentum": Momentum,
+    "nesterov": Nesterov,
+    "adam": Adam,
+    "line_search": LineSearch,
+    "lbfgs": LBFGS,
+}
+
+
+# turn a name like "adam" into an optimizer object (or pass an Optimizer object straight through)
+def make_optimizer(optimizer, learning_rate):
+    if isinstance(optimizer, Optimizer):
+        return optimizer
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"optimizer must be one of {tuple(OPTIMIZERS)} or an Optimizer, got {optimizer!r}")
+    return OPTIMIZERS[optimizer](learning_rate=learning_rate)
@@ -0,0 +1,183 @@
+#data-parallel gradient descent over row shards (gradient_mode="parallel" in LinearRegressionScratch)
+# every gradient step needs X.w (forward) and X^T.errors (backward), both one pass over all n rows
+# those passes split cleanly by rows: rows 0..k and rows k..n each give a partial X^T.e and a partial squared error,
+# and adding the partials gives exactly the full-data numbers
+# so the normalized X is copied once into shared memory and cut into one shard of rows per worker process,
+# each worker computes its shard's partial sums, and the main process adds them up and takes the optimizer step
+# only theta (d + 1 numbers) goes to the workers and only d + 2 numbers come back per shard, never any rows
+
+# thread control: each worker's BLAS (the library numpy's dot products run on) can start its own threads,
+# n_jobs workers x n_cores BLAS threads would fight over the cores, so blas_threads limits them inside the workers
+# (through threadpoolctl, which scikit-learn installs; without it the limit is skipped)
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+
+# a new, unfilled array in a shared memory block
+# returns the block (the caller must close + unlink it), a small picklable description of it, and the array
+def empty_shared_array(shape, dtype):
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    view = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return shm, (shm.name, tuple(shape), dtype.str), view
+
+
+# copy an array into a new shared memory block
+# returns the block (the caller must close + unlink it) and a small picklable description of it
+def share_array(array):
+    array = np.asarray(array)
+    shm, spec, view = empty_shared_array(array.shape, array.dtype)
+    view[:] = array
+    return shm, spec
+
+
+# the array a share_array description points to, viewed in place (no copy)
+# the block goes into blocks, which has to stay alive as long as the array is used
+def attach_array(spec, blocks):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    blocks.append(shm)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+# (start, stop) rows of n_shards shards as even as possible
+def shard_bounds(n_rows, n_shards):
+    edges = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+
+# worker side: attach to X and y once at startup, one objective (with its own scratch buffer) per shard it runs
+_worker_blocks = []
+_worker_X = None
+_worker_y = None
+_worker_objectives = {}
+_worker_thread_limit = None
+
+
+def _init_worker(X_spec, y_spec, blas_threads):
+    global _worker_X, _worker_y, _worker_thread_limit
+    if blas_threads is not None and threadpool_limits is not None:
+        # kept in a global so the limit lasts for the worker's whole life
+        _worker_thread_limit = threadpool_limits(limits=blas_threads, user_api="blas")
+    _worker_X = attach_array(X_spec, _worker_blocks)
+    _worker_y = attach_array(y_spec, _worker_blocks)
+
+
+def _shard_objective(X, y, start, stop, cache):
+    from linear_regression_scratch import _DataObjective
+
+    if (start, stop) not in cache:
+        cache[start, stop] = _DataObjective(X[start:stop], y[start:stop])
+    return cache[start, stop]
+
+
+# one shard's share of an objective method, as sums (not averages) so shards can simply be added up
+    # "cost_and_gradient": (squared error sum / 2 or None, X^T e and sum(e))
+    # "cost": squared error sum / 2
+    # "curvature": |X.d_w + d_b|^2
+    # "hessian_vector": X^T (X.v_w + v_b) and its sum
+def _shard_sums(objective, method, args):
+    m = objective.m
+    if method == "cost_and_gradient":
+        cost, grad = objective.cost_and_gradient(*args)
+        return (None if cost is None else cost * m), grad * m
+    return getattr(objective, method)(*args) * m
+
+
+def _run_shard(start, stop, method, args):
+    objective = _shard_objective(_worker_X, _worker_y, start, stop, _worker_objectives)
+    return _shard_sums(objective, method, args)
+
+
+# the MSE objective of (X, y) computed shard by shard in a pool of worker processes
+# has the same methods as the objectives in linear_regression_scratch.py, so the optimizers and the
+# training loop use it unchanged; use it in a with block (or call close()) to stop the workers and free the memory
+# n_jobs: worker processes = shards (None = one per CPU core, 1 = run the shards in this process, no pool)
+# blas_threads: BLAS threads per worker (None = leave BLAS alone)
+# mean, std: when given, X is raw and gets normalized on the way in, written straight into the shared block
+# (np.subtract(..., out=) then /= in place), so no normalized copy exists besides the shared one
+class ShardedObjective:
+
+    def __init__(self, X, y, n_jobs=None, blas_threads=None, mean=None, std=None):
+        self.y = y
+        self.m = len(y)
+        self.n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, self.m))
+        self.shards = shard_bounds(self.m, self.n_jobs)
+        self._blocks = []
+        self._pool = None
+        self._local_objectives = {}
+        if self.n_jobs > 1:
+            if mean is None:
+                X_shm, X_spec = share_array(X)
+                self.X = X
+            else:
+                X_shm, X_spec, self.X = empty_shared_array(X.shape, X.dtype)
+                np.subtract(X, mean, out=self.X)
+                self.X /= std
+            y_shm, y_spec = share_array(y)
+            self._blocks = [X_shm, y_shm]
+            self._pool = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                             initargs=(X_spec, y_spec, blas_threads))
+        elif mean is None:
+            self.X = X
+        else:
+            # one process: the normalized copy is an ordinary array
+            self.X = np.subtract(X, mean)
+            self.X /= std
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        # self.X may be a view into a block, drop it before the block goes away
+        self.X = None
+        self._local_objectives = {}
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    # every shard's sums for one method call, in shard order
+    def _map(self, method, *args):
+        if self._pool is None:
+            return [_shard_sums(_shard_objective(self.X, self.y, start, stop, self._local_objectives), method, args)
+                    for start, stop in self.shards]
+        futures = [self._pool.submit(_run_shard, start, stop, method, args) for start, stop in self.shards]
+        return [future.result() for future in futures]
+
+    # the reduce step: add up the shards' sums, divide by the total number of rows
+    def cost_and_gradient(self, theta, with_cost=True):
+        parts = self._map("cost_and_gradient", theta, with_cost)
+        grad = np.sum([grad for _, grad in parts], axis=0) / self.m
+        cost = sum(cost for cost, _ in parts) / self.m if with_cost else None
+        return cost, grad.astype(theta.dtype, copy=False)
+
+    def cost(self, theta):
+        return sum(self._map("cost", theta)) / self.m
+
+    def curvature(self, direction):
+        return sum(self._map("curvature", direction)) / self.m
+
+    def hessian_vector(self, v):
+        return np.sum(self._map("hessian_vector", v), axis=0) / self.m
+
+    # only needed once (learning_rate="auto" with few features), so it is computed here from the whole X
+    def hessian(self):
+        from linear_regression_scratch import _augmented_hessian
+
+        return _augmented_hessian(np.dot(self.X.T, self.X) / self.m, np.mean(self.X, axis=0))
@@ -0,0 +1,291 @@
+#renders the three PNG reports
+# each figure is drawn from a small "payload" of plain numpy arrays (a histogram, a few thousand sampled points,
+# the cost history...) instead of the whole dataset or the models
+# that makes it cheap to ship a figure to a background process, so plots can be drawn while models train
+# matplotlib is only imported inside the render functions, so the main process never loads it in background mode
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# "scatter" draws a random sample of points (2000 for the data figure, 500 for predictions)
+# "binned" counts ALL the rows into a fixed grid with np.histogram2d and draws the grid
+    # nothing gets thrown away, and the payload / draw time / file size stay the same for 20 thousand or 20 million rows
+PLOT_STYLES = ("scatter", "binned")
+GRID_BINS = 100
+
+
+def _check_style(style):
+    if style not in PLOT_STYLES:
+        raise ValueError(f"style must be one of {PLOT_STYLES}, got {style!r}")
+
+
+# counts of points per (x, y) cell, plus the cell edges
+def _density_grid(x, y, bins=GRID_BINS, range=None):
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins, range=range)
+    return {'counts': counts, 'x_edges': x_edges, 'y_edges': y_edges}
+
+
+# draw a grid from _density_grid (or any values on the same edges)
+# histogram2d's first axis is x, pcolormesh wants rows = y, hence the .T
+def _draw_grid(plt, ax, grid, values, cmap, norm=None, label=None):
+    mesh = ax.pcolormesh(grid['x_edges'], grid['y_edges'], values.T, cmap=cmap, norm=norm)
+    if label:
+        plt.colorbar(mesh, ax=ax, label=label)
+    return mesh
+
+
+# matplotlib with the Agg backend: draws straight to image files, no window / GUI toolkit needed
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# ---- payloads: computed in the main process, only small arrays ----
+
+def data_exploration_payload(X, y, feature_names, style="scatter"):
+    _check_style(style)
+    X = np.asarray(X)
+    y = np.asarray(y)
+    counts, edges = np.histogram(y, bins=50)
+
+    # Pearson correlation of every feature with the target (what df.corr()['Target'] gives)
+    X_centered = X - X.mean(axis=0)
+    y_centered = y - y.mean()
+    correlations = (np.dot(X_centered.T, y_centered)
+                    / np.sqrt(np.sum(X_centered ** 2, axis=0) * np.dot(y_centered, y_centered)))
+    order = np.argsort(correlations)
+
+    columns = {name: i for i, name in enumerate(feature_names)}
+    payload = {
+        'style': style,
+        'hist_counts': counts,
+        'hist_edges': edges,
+        'target_mean': float(y.mean()),
+        'correlation_names': [feature_names[i] for i in order],
+        'correlations': correlations[order],
+    }
+    income = X[:, columns['MedInc']]
+    longitude = X[:, columns['Longitude']]
+    latitude = X[:, columns['Latitude']]
+
+    if style == "binned":
+        payload['income_grid'] = _density_grid(income, y)
+        # average price per map cell: sum of prices in the cell / number of houses in it
+        geo = _density_grid(longitude, latitude)
+        price_sums = np.histogram2d(longitude, latitude, bins=[geo['x_edges'], geo['y_edges']], weights=y)[0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            geo['mean_price'] = np.where(geo['counts'] > 0, price_sums / geo['counts'], np.nan)
+        payload['geo_grid'] = geo
+        return payload
+
+    sample_idx = np.random.choice(len(y), size=min(2000, len(y)), replace=False)
+    payload['income'] = income[sample_idx]
+    payload['longitude'] = longitude[sample_idx]
+    payload['latitude'] = latitude[sample_idx]
+    payload['price'] = y[sample_idx]
+    return payload
+
+
+def training_payload(scratch_model, sklearn_results, scratch_results):
+    return {
+        'cost_history': np.asarray(scratch_model.cost_history, dtype=float),
+        'train_r2': [scratch_results['train_r2'], sklearn_results['train_r2']],
+        'test_r2': [scratch_results['test_r2'], sklearn_results['test_r2']],
+    }
+
+
+def predictions_payload(y_test, scratch_pred, sklearn_pred, style="scatter"):
+    _check_style(style)
+    y_test = np.asarray(y_test)
+    predictions = [np.asarray(scratch_pred), np.asarray(sklearn_pred)]
+    payload = {
+        'style': style,
+        # the red "perfect prediction" line spans the full range, not just the sample
+        'ranges': [(min(y_test.min(), pred.min()), max(y_test.max(), pred.max()))
+                   for pred in predictions],
+    }
+    if style == "binned":
+        # square cells over the same range as the perfect prediction line
+        payload['grids'] = [_density_grid(y_test, pred, range=[value_range, value_range])
+                            for pred, value_range in zip(predictions, payload['ranges'])]
+        return payload
+
+    sample_size = min(500, len(y_test))
+    idx = np.random.choice(len(y_test), sample_size, replace=False)
+    payload['actual'] = y_test[idx]
+    payload['predictions'] = [pred[idx] for pred in predictions]
+    return payload
+
+
+# ---- render functions: payload in, PNG file out ----
+
+def render_data_exploration(payload, path):
+    plt = _pyplot()
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+
+    ax1 = axes[0, 0]
+    edges = payload['hist_edges']
+    # the histogram was already counted, weights=counts redraws those exact bars
+    ax1.hist(edges[:-1], bins=edges, weights=payload['hist_counts'],
+             edgecolor='black', alpha=0.7, color='steelblue')
+    ax1.set_xlabel('Median House Value ($100,000s)')
+    ax1.set_ylabel('Frequency')
+    ax1.set_title('Distribution of House Prices')
+    ax1.axvline(payload['target_mean'], color='red', linestyle='--', label=f"Mean: {payload['target_mean']:.2f}")
+    ax1.legend()
+
+    ax2 = axes[0, 1]
+    correlations = payload['correlations']
+    colors = ['green' if c > 0 else 'red' for c in correlations]
+    ax2.barh(payload['correlation_names'], correlations, color=colors)
+    ax2.set_xlabel('Correlation with House Price')
+    ax2.set_title('Feature Correlations with Target')
+    ax2.axvline(0, color='black', linestyle='-', linewidth=0.5)
+
+    ax3 = axes[1, 0]
+    if payload['style'] == "binned":
+        from matplotlib.colors import LogNorm
+        grid = payload['income_grid']
+        # log color scale so both the crowded middle and the sparse edges show up, empty cells stay blank
+        _draw_grid(plt, ax3, grid, np.ma.masked_equal(grid['counts'], 0), 'Blues', LogNorm(), 'Houses per cell')
+    else:
+        ax3.scatter(payload['income'], payload['price'], alpha=0.3, s=10, color='steelblue')
+    ax3.set_xlabel('Median Income')
+    ax3.set_ylabel('Median House Value ($100,000s)')
+    ax3.set_title('Income vs House Price')
+
+    ax4 = axes[1, 1]
+    if payload['style'] == "binned":
+        grid = payload['geo_grid']
+        scatter = _draw_grid(plt, ax4, grid, np.ma.masked_invalid(grid['mean_price']), 'viridis')
+    else:
+        scatter = ax4.scatter(payload['longitude'], payload['latitude'], c=payload['price'],
+                              cmap='viridis', alpha=0.5, s=10)
+    ax4.set_xlabel('Longitude')
+    ax4.set_ylabel('Latitude')
+    ax4.set_title('Geographic Distribution of House Prices')
+    plt.colorbar(scatter, ax=ax4, label='Price ($100,000s)')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return path
+
+
+def render_training(payload, path):
+    plt = _pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    cost_history = payload['cost_history']
+
+    ax1 = axes[0]
+    ax1.plot(cost_history, color='steelblue', linewidth=1.5)
+    ax1.set_xlabel('Iteration')
+    ax1.set_ylabel('Cost (MSE)')
+    ax1.set_title('Gradient Descent Convergence')
+    ax1.set_yscale('log')
+    ax1.grid(True, alpha=0.3)
+
+    ax1.scatter([0], [cost_history[0]], color='red', s=100,
+                zorder=5, label=f'Initial: {cost_history[0]:.4f}')
+    ax1.scatter([len(cost_history)-1], [cost_history[-1]],
+                color='green', s=100, zorder=5,
+                label=f'Final: {cost_history[-1]:.4f}')
+    ax1.legend()
+
+    ax2 = axes[1]
+    models = ['From Scratch', 'Scikit-learn']
+
+    x = np.arange(len(models))
+    width = 0.35
+
+    bars1 = ax2.bar(x - width/2, payload['train_r2'], width, label='Train R²', color='steelblue')
+    bars2 = ax2.bar(x + width/2, payload['test_r2'], width, label='Test R²', color='coral')
+
+    ax2.set_ylabel('R² Score')
+    ax2.set_title('Model Performance Comparison')
+    ax2.set_xticks(x)
+    ax2.set_xticklabels(models)
+    ax2.legend()
+    ax2.set_ylim(0, 1)
+
+    for bar in bars1 + bars2:
+        height = bar.get_height()
+        ax2.annotate(f'{height:.3f}',
+                    xy=(bar.get_x() + bar.get_width() / 2, height),
+                    xytext=(0, 3),
+                    textcoords="offset points",
+                    ha='center', va='bottom', fontsize=10)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return path
+
+
+def render_predictions(payload, path):
+    plt = _pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+    for i, (ax, (min_val, max_val), title) in enumerate(zip(axes, payload['ranges'],
+                                                            ['From Scratch', 'Scikit-learn'])):
+        if payload['style'] == "binned":
+            from matplotlib.colors import LogNorm
+            grid = payload['grids'][i]
+            _draw_grid(plt, ax, grid, np.ma.masked_equal(grid['counts'], 0), 'Blues', LogNorm(), 'Houses per cell')
+        else:
+            ax.scatter(payload['actual'], payload['predictions'][i], alpha=0.5, s=20, color='steelblue')
+        ax.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2,
+                label='Perfect Prediction')
+
+        ax.set_xlabel('Actual Price ($100,000s)')
+        ax.set_ylabel('Predicted Price ($100,000s)')
+        ax.set_title(f'{title}: Actual vs Predicted')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return path
+
+
+# runs render functions either right away ("serial") or in a pool of background processes ("background")
+# background: submit() returns immediately so the caller can keep training, wait() collects everything at the end
+# style is the PLOT_STYLES choice callers should build their payloads with
+class Renderer:
+
+    def __init__(self, mode="background", max_workers=3, style="scatter"):
+        if mode not in ("background", "serial"):
+            raise ValueError(f"mode must be 'background' or 'serial', got {mode!r}")
+        _check_style(style)
+        self.mode = mode
+        self.style = style
+        self.max_workers = min(max_workers, os.cpu_count() or 1)
+        self._pool = None
+        self._pending = []
+
+    def submit(self, render_fn, payload, path):
+        if self.mode == "serial":
+            render_fn(payload, path)
+            print(f"  Saved: {path}")
+            return
+        # the pool starts on the first figure, so runs without plots never pay for it
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._pending.append(self._pool.submit(render_fn, payload, path))
+
+    # block until every submitted figure is written
+    def wait(self):
+        try:
+            for future in self._pending:
+                print(f"  Saved: {future.result()}")
+        finally:
+            self._pending = []
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
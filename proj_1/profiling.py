@@ -0,0 +1,225 @@
+#where does an experiment's time go: a stage profiler for main.py (python main.py --profile run)
+# code marks its stages with `with stage("train scratch"):`, stages can sit inside other stages
+# while a Profiler is active each stage records:
+    # wall time (perf_counter) and CPU time (process_time, the time this process actually computed)
+    # peak traced memory: the most Python / numpy memory allocated at once during the stage, above what was
+    # allocated when it started (tracemalloc)
+    # RSS (memory the OS gave the process) when the stage ended, and how much the process' max RSS grew
+# with no active Profiler, stage() does nothing, so the markers can stay in the code
+# model methods are profiled too by wrapping them (Profiler.instrument), every fit / predict call becomes a stage
+# results: a JSON summary and a Chrome trace file (open it in chrome://tracing or https://ui.perfetto.dev)
+
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_active = None
+
+
+# memory the process holds right now (MB), from /proc on Linux, None elsewhere
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# the most memory the process has held so far (MB), ru_maxrss is in KB on Linux but bytes on macOS
+# None on Windows, which has no resource module
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+class _Stage:
+
+    def __init__(self, name, depth, parent):
+        self.name = name
+        self.depth = depth
+        self.parent = parent
+        self.peak = 0
+
+
+class Profiler:
+
+    # trace_memory=False skips tracemalloc (it slows down allocation-heavy code, which skews the timings)
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+        self._patched = []
+        self._origin = None
+        self._started_tracemalloc = False
+
+    def start(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError("another Profiler is already active")
+        self._origin = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        _active = self
+        return self
+
+    def stop(self):
+        global _active
+        for owner, name, original in reversed(self._patched):
+            if original is None:
+                # the method came from a base class, removing the wrapper uncovers it again
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched = []
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        _active = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # tracemalloc has one peak counter for the whole process, so it is reset at every stage boundary
+    # and each stage keeps its own running peak, handing it up to its parent when it ends
+    def _take_peak(self):
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        return peak
+
+    @contextmanager
+    def stage(self, name, **details):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        parent = self._stack[-1] if self._stack else None
+        if tracing and parent is not None:
+            parent.peak = max(parent.peak, self._take_peak())
+        elif tracing:
+            tracemalloc.reset_peak()
+        current = _Stage(name, len(self._stack), parent)
+        traced_start = tracemalloc.get_traced_memory()[0] if tracing else 0
+        max_rss_start = _max_rss_mb()
+        self._stack.append(current)
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._stack.pop()
+            if tracing:
+                current.peak = max(current.peak, self._take_peak())
+                if parent is not None:
+                    parent.peak = max(parent.peak, current.peak)
+            path = [name]
+            ancestor = parent
+            while ancestor is not None:
+                path.append(ancestor.name)
+                ancestor = ancestor.parent
+            self.records.append({
+                'name': name,
+                'path': " / ".join(reversed(path)),
+                'depth': current.depth,
+                'start_s': wall_start - self._origin,
+                'wall_s': wall,
+                'cpu_s': cpu,
+                'peak_traced_mb': (current.peak - traced_start) / 2**20 if tracing else None,
+                'rss_mb': _rss_mb(),
+                'max_rss_growth_mb': None if max_rss_start is None else _max_rss_mb() - max_rss_start,
+                'details': details,
+            })
+
+    # wrap owner.method_name (a class or a single object) so every call is a stage named label.method_name
+    # the originals are put back by stop()
+    def instrument(self, owner, method_names, label=None):
+        label = label or getattr(owner, '__name__', type(owner).__name__)
+        for method_name in method_names:
+            original = getattr(owner, method_name)
+
+            def wrapper(*args, _original=original, _name=f"{label}.{method_name}", **kwargs):
+                with stage(_name):
+                    return _original(*args, **kwargs)
+
+            functools.update_wrapper(wrapper, original)
+            # what owner itself had under that name (None if it was inherited), so stop() restores exactly that
+            self._patched.append((owner, method_name, vars(owner).get(method_name)))
+            setattr(owner, method_name, wrapper)
+        return self
+
+    # totals per stage name (a model method called many times adds up into one line) plus every record
+    # both in the order the stages started
+    def summary(self):
+        records = sorted(self.records, key=lambda record: (record['start_s'], record['depth']))
+        totals = {}
+        for record in records:
+            total = totals.setdefault(record['path'], {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_traced_mb': None})
+            total['calls'] += 1
+            total['wall_s'] += record['wall_s']
+            total['cpu_s'] += record['cpu_s']
+            if record['peak_traced_mb'] is not None:
+                total['peak_traced_mb'] = max(total['peak_traced_mb'] or 0.0, record['peak_traced_mb'])
+        return {
+            'pid': os.getpid(),
+            'trace_memory': self.trace_memory,
+            'max_rss_mb': _max_rss_mb(),
+            'stages': totals,
+            'records': records,
+        }
+
+    def save_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    # Chrome trace event format: one complete ("X") event per stage, times in microseconds
+    # stages nest in the viewer the same way they nested in the code
+    def save_chrome_trace(self, path):
+        pid = os.getpid()
+        events = []
+        for record in self.summary()['records']:
+            events.append({
+                'name': record['name'],
+                'cat': "stage" if "." not in record['name'] else "model",
+                'ph': "X",
+                'ts': record['start_s'] * 1e6,
+                'dur': record['wall_s'] * 1e6,
+                'pid': pid,
+                'tid': 0,
+                'args': {key: record[key] for key in ('cpu_s', 'peak_traced_mb', 'rss_mb', 'max_rss_growth_mb')},
+            })
+        with open(path, "w") as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': "ms"}, f)
+        return path
+
+    def print_report(self):
+        print("\n" + "=" * 60)
+        print("PROFILE")
+        print("=" * 60)
+        print(f"{'stage':<44} {'calls':>5} {'wall s':>8} {'cpu s':>8} {'peak MB':>8}")
+        for path, total in self.summary()['stages'].items():
+            depth = path.count(" / ")
+            name = "  " * depth + path.rsplit(" / ", 1)[-1]
+            peak = f"{total['peak_traced_mb']:8.1f}" if total['peak_traced_mb'] is not None else f"{'-':>8}"
+            print(f"{name[:44]:<44} {total['calls']:>5} {total['wall_s']:8.3f} {total['cpu_s']:8.3f} {peak}")
+
+
+# mark a stage of the active Profiler (does nothing when none is active)
+@contextmanager
+def stage(name, **details):
+    if _active is None:
+        yield None
+        return
+    with _active.stage(name, **details) as current:
+        yield current
@@ -0,0 +1,441 @@
+#local prediction server with micro-batching
+# one prediction per request is mostly overhead: parsing, array conversion, a numpy call for a single row
+# instead, requests that arrive around the same time are put in a queue and scored together
+    # the first request in the queue starts a timer (max_wait_ms)
+    # everything that arrives before the timer runs out (up to max_batch_size rows) joins the same batch
+    # the batch is one X @ w + b call, and every request gets its own row of the answer back
+# plain asyncio + a tiny HTTP/1.1 implementation, so nothing beyond numpy is needed
+
+# endpoints (JSON in, JSON out):
+    # POST /predict  {"features": [8 numbers]}          -> {"prediction": 2.31}
+    #                {"instances": [[8 numbers], ...]}  -> {"predictions": [2.31, ...]}
+    # GET  /stats    request / batch counters, latency percentiles, throughput
+    # GET  /health   {"status": "ok", "n_features": 8}
+
+# usage:
+    # python serve.py serve models/scratch_model.linreg --port 8000
+    # python serve.py bench models/scratch_model.linreg --clients 64 --requests 20000
+
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from model_io import LinearScorer, load_scorer
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 1.0
+# how many of the most recent request latencies the percentiles are computed from
+LATENCY_WINDOW = 10000
+
+
+# a .linreg file (model_io) or a pickled LinearRegressionScratch / LinearRegressionSklearn (main.py train)
+# either way it becomes a LinearScorer, so serving never re-normalizes X
+def load_for_serving(path):
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            return LinearScorer.from_model(pickle.load(f))
+    return load_scorer(path)
+
+
+# counters for /stats
+# latencies go into a fixed-size ring buffer, so the server's memory doesn't grow with the request count
+class ServerStats:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.errors = 0
+        self._latencies = np.zeros(LATENCY_WINDOW)
+        self._n_latencies = 0
+
+    def record_batch(self, n_rows):
+        self.batches += 1
+        self.rows += n_rows
+        self.largest_batch = max(self.largest_batch, n_rows)
+
+    def record_latency(self, seconds):
+        self._latencies[self._n_latencies % LATENCY_WINDOW] = seconds
+        self._n_latencies += 1
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        latencies = self._latencies[:min(self._n_latencies, LATENCY_WINDOW)] * 1000
+        percentiles = (np.percentile(latencies, [50, 90, 99]) if len(latencies) else [0.0, 0.0, 0.0])
+        return {
+            'uptime_s': uptime,
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'mean_batch_rows': self.rows / self.batches if self.batches else 0.0,
+            'largest_batch_rows': self.largest_batch,
+            'requests_per_s': self.requests / uptime if uptime > 0 else 0.0,
+            'rows_per_s': self.rows / uptime if uptime > 0 else 0.0,
+            'latency_ms': {
+                'p50': float(percentiles[0]),
+                'p90': float(percentiles[1]),
+                'p99': float(percentiles[2]),
+                'max': float(latencies.max()) if len(latencies) else 0.0,
+            },
+        }
+
+
+# rows as a float64 matrix, refusing any row that isn't all finite numbers
+# null becomes NaN on the way in, and NaN / Infinity (which Python's json accepts) would be scored
+# and sent back as NaN, which isn't valid JSON
+def _rows_to_matrix(rows):
+    X = np.array(rows, dtype=np.float64)
+    finite = np.isfinite(X).all(axis=1)
+    if not finite.all():
+        raise ValueError(f"row {int(np.argmin(finite))} has a missing or non-finite value (null, NaN or Infinity)")
+    return X
+
+
+# collects rows from concurrent requests and scores them together
+# no queue or background task: requests are appended to a pending list and a single timer flushes it
+    # the first pending request sets the timer (call_later max_wait), a full batch flushes right away
+    # max_wait_ms=0 still batches: it flushes at the end of the current event loop pass,
+    # so everything that arrived in that pass goes together
+# rows stay plain Python lists until the flush, so the conversion to a numpy array happens once per batch
+class MicroBatcher:
+
+    def __init__(self, scorer, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, stats=None):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.scorer = scorer
+        self.n_features = len(scorer.weights)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or ServerStats()
+        self._rows = []
+        self._futures = []
+        self._timer = None
+
+    # rows: list of rows (each a list of n_features numbers), returns their predictions as an array
+    # once the batch they ended up in has been scored
+    async def predict(self, rows):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._rows.extend(rows)
+        self._futures.append((future, len(rows)))
+        if len(self._rows) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            if self.max_wait > 0:
+                self._timer = loop.call_later(self.max_wait, self.flush)
+            else:
+                self._timer = loop.call_soon(self.flush)
+        return await future
+
+    # score everything that's pending
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, futures = self._rows, self._futures
+        self._rows, self._futures = [], []
+        if not futures:
+            return
+
+        try:
+            predictions = self.scorer.predict(_rows_to_matrix(rows))
+        except (ValueError, TypeError):
+            # some row in the batch is bad (not numbers, or null / NaN / Infinity),
+            # score each request on its own so only it fails
+            self._score_separately(rows, futures)
+            return
+        self.stats.record_batch(len(rows))
+        # hand every request its own slice of the batch
+        start = 0
+        for future, n_rows in futures:
+            # the client may have hung up while waiting
+            if not future.done():
+                future.set_result(predictions[start:start + n_rows])
+            start += n_rows
+
+    def _score_separately(self, rows, futures):
+        start = 0
+        for future, n_rows in futures:
+            part = rows[start:start + n_rows]
+            start += n_rows
+            try:
+                result = self.scorer.predict(_rows_to_matrix(part))
+                self.stats.record_batch(n_rows)
+            except (ValueError, TypeError) as error:
+                result = error
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# ---- minimal HTTP/1.1 (keep-alive, Content-Length bodies only) ----
+
+_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+# read one request or response: (first line, headers, body), or None when the connection closed
+# a Content-Length that isn't a whole number raises ValueError (the body can't be found without it)
+async def _read_message(reader):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    first_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length", "0")
+    if not length.isdigit():
+        raise ValueError(f"Content-Length must be a whole number, got {length!r}")
+    body = await reader.readexactly(int(length))
+    return first_line, headers, body
+
+
+def _encode_message(first_line, payload):
+    body = json.dumps(payload).encode()
+    return (f"{first_line}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            .encode() + body)
+
+
+# the JSON body of POST /predict as a list of rows, plus whether it was a single row
+# only the shape is checked here, the numbers are converted with the rest of the batch
+def _parse_rows(body, n_features):
+    request = json.loads(body)
+    if "features" in request:
+        rows, single = [request["features"]], True
+    elif "instances" in request:
+        rows, single = request["instances"], False
+    else:
+        raise ValueError('expected {"features": [...]} or {"instances": [[...], ...]}')
+    if not rows or not all(isinstance(row, list) and len(row) == n_features for row in rows):
+        raise ValueError(f"each row needs exactly {n_features} numbers")
+    return rows, single
+
+
+async def _dispatch(method, path, body, batcher):
+    stats = batcher.stats
+    if path == "/predict":
+        if method != "POST":
+            return 405, {'error': "use POST"}
+        started = time.perf_counter()
+        stats.requests += 1
+        try:
+            rows, single = _parse_rows(body, batcher.n_features)
+        except (ValueError, TypeError) as error:
+            stats.errors += 1
+            return 400, {'error': str(error)}
+        try:
+            predictions = await batcher.predict(rows)
+        except (ValueError, TypeError) as error:
+            stats.errors += 1
+            return 400, {'error': f"rows must contain only finite numbers ({error})"}
+        stats.record_latency(time.perf_counter() - started)
+        if single:
+            return 200, {'prediction': float(predictions[0])}
+        return 200, {'predictions': predictions.tolist()}
+    if path == "/stats":
+        return 200, stats.snapshot()
+    if path == "/health":
+        return 200, {'status': "ok", 'n_features': batcher.n_features}
+    return 404, {'error': f"unknown path {path}"}
+
+
+async def _handle_connection(reader, writer, batcher):
+    try:
+        # keep-alive: one connection can send many requests, one after another
+        while True:
+            try:
+                message = await _read_message(reader)
+            except ValueError as error:
+                # without a usable length the next request's start is unknown, so answer and hang up
+                writer.write(_encode_message("HTTP/1.1 400 Bad Request", {'error': str(error)}))
+                await writer.drain()
+                break
+            if message is None:
+                break
+            first_line, headers, body = message
+            # "METHOD /path HTTP/1.1"
+            request_line = first_line.split(" ")
+            if len(request_line) < 2:
+                status, payload = 400, {'error': f"malformed request line {first_line!r}"}
+            else:
+                status, payload = await _dispatch(request_line[0], request_line[1], body, batcher)
+            writer.write(_encode_message(f"HTTP/1.1 {status} {_STATUS[status]}", payload))
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+# run until interrupted, on a TCP port or (unix_path) a Unix socket
+async def serve(scorer, host="127.0.0.1", port=8000, unix_path=None,
+                max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, verbose=True):
+    batcher = MicroBatcher(scorer, max_batch_size, max_wait_ms)
+
+    def handler(reader, writer):
+        return _handle_connection(reader, writer, batcher)
+
+    if unix_path:
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        where = f"http://{host}:{port}"
+    if verbose:
+        print(f"Serving {batcher.n_features}-feature model on {where} "
+              f"(max batch {max_batch_size} rows, max wait {max_wait_ms} ms)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+# ---- load generator ----
+
+async def _client_request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    first_line, _, body = await _read_message(reader)
+    return int(first_line.split(" ")[1]), json.loads(body)
+
+
+async def _wait_until_ready(host, port, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"server on port {port} did not come up")
+            await asyncio.sleep(0.05)
+            continue
+        _, health = await _client_request(reader, writer, "GET", "/health")
+        writer.close()
+        return health['n_features']
+
+
+# n_clients connections, each sending single-row requests back to back until n_requests are done in total
+async def _load_test(host, port, n_clients, n_requests, seed=0):
+    n_features = await _wait_until_ready(host, port)
+    rows = np.random.default_rng(seed).normal(size=(1024, n_features)).tolist()
+    latencies = []
+    remaining = [n_requests]
+
+    async def client(index):
+        reader, writer = await asyncio.open_connection(host, port)
+        i = index
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            status, _ = await _client_request(reader, writer, "POST", "/predict", {'features': rows[i % len(rows)]})
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                raise RuntimeError(f"server answered {status}")
+            i += n_clients
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(n_clients)))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_stats = await _client_request(reader, writer, "GET", "/stats")
+    writer.close()
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'latency_ms': {name: float(value) for name, value
+                       in zip(("p50", "p90", "p99"), np.percentile(latencies, [50, 90, 99]))},
+        'server_mean_batch_rows': server_stats['mean_batch_rows'],
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# start the server in its own process (so it doesn't share the CPU / event loop with the clients)
+# and hammer it, once micro-batched and once with max_batch_size=1 (every request scored on its own)
+def benchmark(model_path, n_clients=64, n_requests=20000,
+              max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    results = {}
+    for label, batch_size in (("micro-batched", max_batch_size), ("unbatched", 1)):
+        port = _free_port()
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", model_path,
+                                   "--port", str(port), "--max-batch-size", str(batch_size),
+                                   "--max-wait-ms", str(max_wait_ms), "--quiet"])
+        try:
+            results[label] = asyncio.run(_load_test("127.0.0.1", port, n_clients, n_requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+        result = results[label]
+        print(f"{label:>14}: {result['requests_per_s']:8.0f} req/s   "
+              f"p50 {result['latency_ms']['p50']:6.2f} ms   p99 {result['latency_ms']['p99']:6.2f} ms   "
+              f"mean batch {result['server_mean_batch_rows']:.1f} rows")
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Micro-batching prediction server for the trained models")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("serve", "serve a trained model over HTTP"),
+                            ("bench", "measure throughput / latency with a local load generator")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("model", help=".linreg file or pickled model from 'python main.py train'")
+        sub.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                         help=f"most rows scored in one batch (default: {DEFAULT_MAX_BATCH_SIZE})")
+        sub.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                         help=f"how long the first request waits for others to join (default: {DEFAULT_MAX_WAIT_MS})")
+
+    serve_parser = subparsers.choices["serve"]
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--unix", help="listen on this Unix socket path instead of a TCP port")
+    serve_parser.add_argument("--quiet", action="store_true", help="don't print the startup line")
+
+    bench_parser = subparsers.choices["bench"]
+    bench_parser.add_argument("--clients", type=int, default=64, help="concurrent connections (default: 64)")
+    bench_parser.add_argument("--requests", type=int, default=20000, help="total requests (default: 20000)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "serve":
+        scorer = load_for_serving(args.model)
+        try:
+            asyncio.run(serve(scorer, args.host, args.port, args.unix,
+                              args.max_batch_size, args.max_wait_ms, verbose=not args.quiet))
+        except KeyboardInterrupt:
+            pass
+    else:
+        benchmark(args.model, args.clients, args.requests, args.max_batch_size, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
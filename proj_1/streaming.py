@@ -0,0 +1,90 @@
+#tools for training on data that doesn't fit in memory all at once
+# instead of one big X, the data comes as a series of (X_chunk, y_chunk) pieces
+# only one chunk is ever loaded at a time, so memory use depends on the chunk size, not the dataset size
+
+import numpy as np
+
+
+# mean and standard deviation that can be built up one chunk at a time
+# Welford / Chan style: keep the count, the mean and M2 (sum of squared distances from the mean)
+# two RunningMoments can be merged, so chunks (or whole files) can be summarized separately and combined
+# this avoids the "sum of squares minus square of sums" formula, which loses precision on big numbers
+class RunningMoments:
+
+    def __init__(self, n_features=None):
+        self.count = 0
+        self.mean = None if n_features is None else np.zeros(n_features)
+        self.m2 = None if n_features is None else np.zeros(n_features)
+
+    # build the moments of a whole array in one go
+    @classmethod
+    def from_array(cls, X):
+        moments = cls()
+        moments.update(X)
+        return moments
+
+    # fold a chunk of rows into the running totals
+    def update(self, X_chunk):
+        X_chunk = np.asarray(X_chunk)
+        if X_chunk.shape[0] == 0:
+            return self
+        chunk = RunningMoments()
+        chunk.count = X_chunk.shape[0]
+        chunk.mean = np.mean(X_chunk, axis=0)
+        chunk.m2 = np.sum((X_chunk - chunk.mean) ** 2, axis=0)
+        return self.merge(chunk)
+
+    # combine another set of moments into this one
+    # delta is how far apart the two means are, it adds the spread "between" the two groups
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count = other.count
+            self.mean = np.array(other.mean, dtype=float)
+            self.m2 = np.array(other.m2, dtype=float)
+            return self
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / total)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / total)
+        self.count = total
+        return self
+
+    # population variance / std (divide by n), same as np.std's default
+    @property
+    def variance(self):
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+# turn whatever the caller gave us into a fresh iterator of chunks
+# training needs several passes, so a callable (called once per pass) or a list both work
+# a plain generator only works once, that gets caught by the caller when a pass comes back empty
+def iter_chunks(chunks):
+    if callable(chunks):
+        return iter(chunks())
+    return iter(chunks)
+
+
+# chunks from arrays that are already in memory (or memory-mapped)
+# slicing a np.memmap only reads those rows from disk
+def array_chunks(X, y, chunk_size=65536):
+    def make_chunks():
+        for start in range(0, X.shape[0], chunk_size):
+            yield X[start:start + chunk_size], y[start:start + chunk_size]
+    return make_chunks
+
+
+# chunks from .npy files on disk, opened memory-mapped so nothing is read until a chunk is sliced
+# np.save(path, X) writes a file this can read
+def npy_chunks(X_path, y_path, chunk_size=65536):
+    X = np.load(X_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    if X.shape[0] != y.shape[0]:
+        raise ValueError(f"X has {X.shape[0]} rows but y has {y.shape[0]}")
+    return array_chunks(X, y, chunk_size)
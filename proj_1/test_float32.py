@@ -0,0 +1,46 @@
+#dtype=np.float32 should give the same fit as float64 (to float32's ~7 digits) and keep everything float32
+# every direct solver and every gradient descent optimizer is fit twice on the same data, once per dtype
+
+import numpy as np
+import pytest
+
+from linear_regression_scratch import LinearRegressionScratch
+from optimizers import OPTIMIZERS
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(1)
+    # housing-like columns: different scales and offsets, so the normalization matters
+    X = rng.normal(size=(5000, 6)) * [1.0, 10.0, 100.0, 0.1, 5.0, 2.0] + [3.0, 30.0, 1000.0, 0.0, -5.0, 8.0]
+    y = np.dot(X, [0.5, -0.2, 0.01, 4.0, 1.0, -0.3]) + 2.0 + rng.normal(scale=0.5, size=len(X))
+    return X, y
+
+
+CONFIGS = ([{'solver': solver} for solver in ("normal", "cholesky", "qr", "lstsq")]
+           + [{'solver': "gd", 'optimizer': optimizer, 'learning_rate': "auto", 'n_iterations': 300}
+              for optimizer in OPTIMIZERS])
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=lambda config: config.get('optimizer', config['solver']))
+def test_float32_matches_float64(data, config):
+    X, y = data
+    model64 = LinearRegressionScratch(dtype=np.float64, verbose=False, **config).fit(X, y)
+    model32 = LinearRegressionScratch(dtype=np.float32, verbose=False, **config).fit(X, y)
+
+    assert model32.weights.dtype == np.float32
+    assert model32.predict(X).dtype == np.float32
+    assert abs(model32.score(X, y) - model64.score(X, y)) < 1e-5
+
+
+# the rank-deficiency checks must not depend on the row count: a big, well-conditioned float32 problem
+# has to stay on the requested solver instead of falling back to the SVD
+@pytest.mark.parametrize("solver", ["normal", "cholesky", "qr"])
+def test_float32_large_n_keeps_the_direct_solver(solver):
+    rng = np.random.default_rng(2)
+    # correlated columns, so X^T X has a condition number around 100
+    X = rng.normal(size=(200_000, 8))
+    X[:, 1] = X[:, 0] + 0.2 * X[:, 1]
+    y = np.dot(X, np.arange(1.0, 9.0)) + rng.normal(size=len(X))
+    model = LinearRegressionScratch(dtype=np.float32, solver=solver, verbose=False).fit(X, y)
+    assert model.solver_ == solver
@@ -0,0 +1,44 @@
+#the full-batch training loop must not allocate anything n-sized per step
+# _DataObjective reuses one scratch buffer for the errors, so after the objective is built
+# a whole fit should only allocate a few d-sized arrays (theta, gradients, optimizer state)
+# run with: python -m pytest -q
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from callbacks import CallbackList
+from linear_regression_scratch import LinearRegressionScratch, _DataObjective
+
+N_ROWS = 500_000
+N_FEATURES = 8
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(N_ROWS, N_FEATURES))
+    y = np.dot(X, np.arange(1.0, N_FEATURES + 1)) + 3.0 + rng.normal(scale=0.1, size=N_ROWS)
+    return X, y
+
+
+@pytest.mark.parametrize("optimizer", ["gd", "momentum", "line_search", "lbfgs"])
+def test_full_batch_loop_peak_memory_is_not_n_sized(data, optimizer):
+    X, y = data
+    model = LinearRegressionScratch(optimizer=optimizer, learning_rate=0.1, n_iterations=20, verbose=False)
+    model._init_parameters(N_FEATURES)
+    # the objective (and its n-sized buffer) is made before tracing starts, only the loop is measured
+    objective = _DataObjective(X, y)
+    hooks = CallbackList()
+
+    tracemalloc.start()
+    try:
+        model._run_full_batch(objective, hooks)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # one n-sized float64 array would be 4 MB, the loop should stay in the kilobytes (~3.5 KB, ~9 KB for lbfgs)
+    assert peak < N_ROWS * X.itemsize / 100
+    assert model.n_iter_ > 0